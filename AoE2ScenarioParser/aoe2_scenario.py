@@ -1,15 +1,29 @@
+import asyncio
 import collections
+import functools
+import io
+import os
+import stat
+import threading
 import time
+import traceback
 import zlib
 from collections import OrderedDict
-from typing import List, Type
+from concurrent.futures import CancelledError, ProcessPoolExecutor, ThreadPoolExecutor
+from mmap import mmap as memory_map, ACCESS_READ
+from typing import Any, List, NamedTuple, Optional, Type
 
-from AoE2ScenarioParser.helper import generator, helper
+from AoE2ScenarioParser.helper import helper
 from AoE2ScenarioParser.helper import parser
+from AoE2ScenarioParser.helper.cursor import ByteCursor, ZlibStreamCursor
+from AoE2ScenarioParser.helper.dependency_plan import compile_dependency_plans
 from AoE2ScenarioParser.helper.helper import create_textual_hex, SimpleLogger
 from AoE2ScenarioParser.helper.retriever import get_retriever_by_name
+from AoE2ScenarioParser.helper.scenario_cache import ScenarioCache
+from AoE2ScenarioParser.objects.aoe2_object import AoE2Object
 from AoE2ScenarioParser.objects.aoe2_object_manager import AoE2ObjectManager
 from AoE2ScenarioParser.objects.map_obj import MapObject
+from AoE2ScenarioParser.objects.terrain_grid import TerrainGrid
 from AoE2ScenarioParser.objects.triggers_obj import TriggersObject
 from AoE2ScenarioParser.objects.units_obj import UnitsObject
 from AoE2ScenarioParser.pieces.aoe2_piece import AoE2Piece
@@ -31,15 +45,20 @@ from AoE2ScenarioParser.pieces.units import UnitsPiece
 class AoE2Scenario:
     @property
     def trigger_manager(self) -> TriggersObject:
-        return self._object_manager.objects['TriggersObject']
+        return self._get_object('TriggersObject')
 
     @property
     def unit_manager(self) -> UnitsObject:
-        return self._object_manager.objects['UnitsObject']
+        return self._get_object('UnitsObject')
 
     @property
     def map_manager(self) -> MapObject:
-        return self._object_manager.objects['MapObject']
+        return self._get_object('MapObject')
+
+    @property
+    def is_partial(self) -> bool:
+        """True when the scenario was read with the `pieces` parameter and not all pieces were read"""
+        return len(self._parsed_header) + len(self._parsed_data) < len(_header_structure) + len(_file_structure)
 
     def __init__(self):
         self.read_mode = None
@@ -47,30 +66,208 @@ class AoE2Scenario:
         self._file_header = None
         self._decompressed_file_data = None
         self._file = None
+        self._parsed_header = collections.OrderedDict()
+        self._parsed_data = collections.OrderedDict()
         self._object_manager = None
+        self._cancel_event = None
 
     @classmethod
-    def from_file(cls, filename, log_reading=True, log_parsing=True):
+    def from_file(cls, filename, log_reading=True, log_parsing=True, pieces=None, mmap=False, cache_dir=None):
+        """
+        Read a scenario file.
+
+        Args:
+            filename (str): The path to the scenario file
+            log_reading (bool): If the reading progress should be printed
+            log_parsing (bool): If the parsing of pieces to objects should be printed
+            pieces (List[Union[str, Type[AoE2Piece]]]): The pieces to read (names or classes). Pieces are stored one
+                after another in the file, so all pieces before a requested piece are read too. Reading stops as soon as
+                all requested pieces are read. The body of the file is decompressed while it's read, so only the
+                part of the body up to the last requested piece is decompressed. When `None` (default) all pieces are
+                read.
+                Scenarios which aren't read completely can't be written and don't have managers.
+            mmap (bool): Memory-map the file instead of reading it into memory. The header and the compressed body are
+                read directly from the mapping, which is closed when reading is done. The file itself isn't kept in
+                memory (`_debug_write_from_source` with "f" isn't available).
+            cache_dir (Union[str, os.PathLike, ScenarioCache]): A directory (or ScenarioCache) to cache the parsed
+                pieces in. When the same file (by content) was read before, the pieces are loaded from the cache
+                instead of being decompressed and parsed. Only used when all pieces are read. (See: `ScenarioCache`)
+        """
         scenario = cls()
         scenario.read_mode = "from_file"
+        scenario.parser = parser.Parser(log_messages=log_reading)
+        pieces_to_read = _get_piece_names(pieces)
+        cache = ScenarioCache(cache_dir) if isinstance(cache_dir, (str, os.PathLike)) else cache_dir
 
-        print("\nPreparing & Loading file: '" + filename + "'...")
-        scenario_file = open(filename, "rb")
-        scenario._file = scenario_file.read()
-        scenario_file.seek(0)  # Reset file cursor to 0
+        SimpleLogger(log_reading).print("\nPreparing & Loading file: '" + filename + "'...")
+        with open(filename, "rb") as scenario_file:
+            if mmap:
+                file_data = memory_map(scenario_file.fileno(), 0, access=ACCESS_READ)
+            else:
+                file_data = scenario._file = scenario_file.read()
 
-        scenario._file_header = scenario_file.read(scenario._compute_header_length())
-        scenario._decompressed_file_data = zlib.decompress(scenario_file.read(), -zlib.MAX_WBITS)
+        try:
+            scenario._load(file_data, log_reading, log_parsing, pieces_to_read, cache)
+        finally:
+            if mmap:
+                file_data.close()
+        return scenario
 
-        scenario_file.close()
-        print("File prepared and loaded.")
+    @classmethod
+    def from_bytes(cls, file_data, log_reading=True, log_parsing=True, pieces=None, cache_dir=None,
+                   cancel_event=None):
+        """
+        Read a scenario from the (raw) content of a scenario file, like an upload which is kept in memory.
+
+        Args:
+            file_data (Union[bytes, bytearray, memoryview]): The content of the scenario file
+            log_reading, log_parsing, pieces, cache_dir: See `from_file`
+            cancel_event (threading.Event): When this event is set (from another thread) reading stops with a
+                CancelledError before the next piece is read (See: `aload`)
+        """
+        scenario = cls()
+        scenario.read_mode = "from_bytes"
+        scenario.parser = parser.Parser(log_messages=log_reading)
+        scenario._file = file_data
+        cache = ScenarioCache(cache_dir) if isinstance(cache_dir, (str, os.PathLike)) else cache_dir
 
-        scenario.parser = parser.Parser()
-        scenario._read_file(log_reading=log_reading)
-        scenario._object_manager = AoE2ObjectManager(scenario._parsed_header, scenario._parsed_data,
-                                                     log_parsing=log_parsing)
+        SimpleLogger(log_reading).print("\nPreparing & Loading file from bytes...")
+        scenario._cancel_event = cancel_event
+        try:
+            scenario._load(file_data, log_reading, log_parsing, _get_piece_names(pieces), cache)
+        finally:
+            scenario._cancel_event = None
+        return scenario
+
+    @classmethod
+    def from_stream(cls, file, log_reading=True, log_parsing=True, pieces=None, cache_dir=None):
+        """
+        Read a scenario from a binary file object (like an opened file or `io.BytesIO`). The stream is read until its
+        end. See `from_file` for the other arguments.
+        """
+        return cls.from_bytes(file.read(), log_reading, log_parsing, pieces, cache_dir)
+
+    @classmethod
+    def read_header(cls, filename, log_reading=False):
+        """
+        Only read the (uncompressed) FileHeaderPiece of a scenario file. This holds the version, timestamp,
+        instructions, player count and creator name. Shorthand for: `from_file(filename, pieces=[FileHeaderPiece])`.
+        """
+        return cls.from_file(filename, log_reading=log_reading, log_parsing=False, pieces=[FileHeaderPiece])
+
+    @classmethod
+    def map_files(cls, paths, fn, workers=None, output_directory=None, **kwargs) -> List['FileResult']:
+        """
+        Read every scenario file and call `fn` with it, spread over multiple processes.
+
+        Files are read without logging by default. An error while reading, in `fn` or while writing only fails that file, it's
+        reported in its FileResult and the other files are processed as usual.
+
+        Args:
+            paths (Iterable[str]): The paths of the scenario files
+            fn (Callable[[AoE2Scenario], Any]): Called with every scenario, its return value is the value of the
+                FileResult. Both `fn` and its return value are sent between processes, so they have to be picklable
+                (Like a function defined at the top level of a module, not a lambda).
+            workers (int): The amount of processes to use. Defaults to the amount of CPUs. When 1, all files are
+                processed in the current process.
+            output_directory (str): When given, every scenario is written (after `fn`) to a file with the same name in
+                this directory. Paths with the same file name would overwrite each other, these fail without being
+                processed.
+            **kwargs: Passed to `from_file` (like `pieces` or `mmap`). Logging is disabled unless it's enabled here.
+
+        Returns:
+            A FileResult for every path, in the same order as the paths
+        """
+        paths = list(paths)
+        results: List[Optional[FileResult]] = [None] * len(paths)
+        tasks = {}
+        if output_directory is None:
+            for index, path in enumerate(paths):
+                tasks[index] = (cls, path, fn, None, kwargs)
+        else:
+            output_paths = [os.path.join(output_directory, os.path.basename(path)) for path in paths]
+            name_counts = collections.Counter(os.path.normcase(output_path) for output_path in output_paths)
+            for index, (path, output_path) in enumerate(zip(paths, output_paths)):
+                count = name_counts[os.path.normcase(output_path)]
+                if count > 1:
+                    error = f"Output file '{output_path}' would be written by {count} paths with the same file name"
+                    results[index] = FileResult(path, error=error)
+                else:
+                    tasks[index] = (cls, path, fn, output_path, kwargs)
+
+        if workers == 1:
+            for index, task in tasks.items():
+                results[index] = _map_file(*task)
+            return results
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {index: executor.submit(_map_file, *task) for index, task in tasks.items()}
+            for index, future in futures.items():
+                try:
+                    results[index] = future.result()
+                except Exception:
+                    # The task couldn't be sent to or returned from the process (Like an unpicklable result)
+                    results[index] = FileResult(paths[index], error=traceback.format_exc())
+        return results
+
+    @classmethod
+    async def aload(cls, filename, log_reading=False, log_parsing=False, pieces=None, executor=None):
+        """
+        Read a scenario file without blocking the event loop. The file is read in the default executor of the loop.
+        Decompressing and parsing is done in the given executor (zlib releases the GIL while decompressing). When the
+        task is cancelled, parsing stops before the next piece is read.
+
+        Args:
+            filename (str): The path to the scenario file
+            log_reading, log_parsing, pieces: See `from_file`
+            executor (concurrent.futures.ThreadPoolExecutor): The pool to parse in. Defaults to a shared pool with
+                `async_workers` threads, so a lot of concurrent loads don't all parse at the same time.
+        """
+        loop = asyncio.get_running_loop()
+        file_data = await loop.run_in_executor(None, _read_file_content, filename)
+        cancel_event = threading.Event()
+        try:
+            scenario = await loop.run_in_executor(
+                executor or _get_async_executor(),
+                functools.partial(cls.from_bytes, file_data, log_reading, log_parsing, pieces, cancel_event=cancel_event)
+            )
+        except asyncio.CancelledError:
+            cancel_event.set()
+            raise
+        scenario.read_mode = "from_file"
         return scenario
 
+    async def asave(self, filename, executor=None, **kwargs):
+        """
+        Write the scenario to a file without blocking the event loop. Committing the managers, serializing,
+        compressing and writing are done in the executor. When the task is cancelled, writing stops before the next
+        piece is written and the file isn't changed. The scenario shouldn't be changed until saving is done.
+
+        Args:
+            filename (str): The path to write the scenario to
+            executor (concurrent.futures.ThreadPoolExecutor): The pool to write in (See: `aload`)
+            **kwargs: Passed to `write_to_file`. Logging is disabled by default.
+        """
+        kwargs.setdefault('log_writing', False)
+        kwargs.setdefault('log_reconstructing', False)
+        loop = asyncio.get_running_loop()
+        cancel_event = threading.Event()
+        try:
+            await loop.run_in_executor(
+                executor or _get_async_executor(),
+                functools.partial(self._write_cancellable, filename, cancel_event, kwargs)
+            )
+        except asyncio.CancelledError:
+            cancel_event.set()
+            raise
+
+    def _write_cancellable(self, filename, cancel_event, kwargs):
+        self._cancel_event = cancel_event
+        try:
+            self.write_to_file(filename, **kwargs)
+        finally:
+            self._cancel_event = None
+
     @classmethod
     def create_default(cls, log_creating=True, log_parsing=False):
         scenario = cls()
@@ -105,18 +302,123 @@ class AoE2Scenario:
                                                      log_parsing=log_parsing)
         return scenario
 
-    def _read_file(self, log_reading):
+    def __reduce__(self):
+        """
+        Scenarios are pickled as the bytes of the header and the decompressed body only. The pieces and managers are
+        read from these bytes again when they're first used after unpickling. Pickling doesn't change the scenario:
+        pieces with changes are serialized without marking them clean.
+
+        Changes to the managers which have been constructed are committed into copies of the pieces they touch (read
+        from the bytes of those pieces). So the manager objects themselves aren't pickled and the pieces of this
+        scenario aren't changed.
+        """
+        state = self.__dict__.get('_unpickled_state')
+        if state is None:
+            pieces = OrderedDict(**self._parsed_header, **self._parsed_data)
+            piece_bytes = OrderedDict((name, piece.to_bytes(pieces)) for name, piece in pieces.items())
+            if self._object_manager is not None and self._object_manager.objects:
+                self._commit_objects_into_copies(pieces, piece_bytes)
+            state = (
+                b''.join(piece_bytes[name] for name in self._parsed_header),
+                b''.join(piece_bytes[name] for name in self._parsed_data),
+                list(pieces) if self.is_partial else None,
+            )
+        return _restore_scenario, (type(self), self.read_mode) + state
+
+    def _commit_objects_into_copies(self, pieces, piece_bytes):
+        """
+        Commit the constructed manager objects into copies of the pieces and replace the bytes of the copied pieces.
+
+        Args:
+            pieces (OrderedDict[str, AoE2Piece]): All pieces
+            piece_bytes (OrderedDict[str, bytes]): The bytes of every piece, the pieces are copied from these bytes
+        """
+        copies = _PieceCopies(pieces, piece_bytes)
+        # Committing points the objects (and the terrain grid) to the pieces they're committed to, which is undone
+        object_states = _save_object_states(self._object_manager.objects.values())
+        try:
+            self._object_manager.reconstruct(pieces=copies)
+        finally:
+            _restore_object_states(object_states)
+        for name, piece in copies.items():
+            piece_bytes[name] = piece.to_bytes(copies)
+
+    def __getattr__(self, name):
+        """The pieces and managers of an unpickled scenario are read when they're first used"""
+        if name in ['_parsed_header', '_parsed_data', '_object_manager'] and '_unpickled_state' in self.__dict__:
+            self._read_unpickled_state()
+            return getattr(self, name)
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+
+    def _read_unpickled_state(self):
+        header, body, piece_names = self.__dict__.pop('_unpickled_state')
+        self._file_header = header
+        self._decompressed_file_data = body
+        self._read_file(log_reading=False, data_cursor=ByteCursor(body), pieces_to_read=piece_names)
+        self._object_manager = None
+        if not self.is_partial:
+            self._object_manager = AoE2ObjectManager(self._parsed_header, self._parsed_data, log_parsing=False)
+
+    def _check_cancelled(self):
+        """Raise a CancelledError when the current read or write has been cancelled (See: `aload` and `asave`)"""
+        if self._cancel_event is not None and self._cancel_event.is_set():
+            raise CancelledError()
+
+    def _get_object(self, name):
+        if self._object_manager is None:
+            raise ValueError("Managers are not available for scenarios which were not read completely")
+        return self._object_manager.get_object(name)
+
+    def _load(self, file_data, log_reading, log_parsing, pieces_to_read, cache):
+        """Read the pieces from the (raw) content of a scenario file (or the cache) and create the object manager"""
+        cache_key = cache.get_key(file_data) if cache is not None and pieces_to_read is None else None
+        snapshot = cache.load(cache_key) if cache_key is not None else None
+        if snapshot is not None:
+            header, body, self._parsed_header, self._parsed_data = snapshot
+            self._file_header = header
+            self._decompressed_file_data = body
+            SimpleLogger(log_reading).print("File loaded from cache.")
+        else:
+            self._read_file_data(file_data, log_reading, pieces_to_read)
+            if cache_key is not None:
+                cache.store(cache_key, self._file_header, self._decompressed_file_data,
+                            self._parsed_header, self._parsed_data)
+        if not self.is_partial:
+            self._object_manager = AoE2ObjectManager(self._parsed_header, self._parsed_data, log_parsing=log_parsing)
+
+    def _read_file_data(self, file_data, log_reading, pieces_to_read=None):
+        """Read the pieces from the (raw) content of a scenario file. The body is decompressed while it's read."""
+        lgr = SimpleLogger(log_reading)
+        header_length = self._compute_header_length(file_data)
+        self._file_header = bytes(file_data[:header_length])
+        data_cursor = ZlibStreamCursor(memoryview(file_data)[header_length:])
+        # Grows while the data is read. Only contains the data up to the last piece read when reading stops early
+        self._decompressed_file_data = data_cursor.buffer
+        lgr.print("File prepared and loaded.")
+
+        try:
+            self._read_file(log_reading=log_reading, data_cursor=data_cursor, pieces_to_read=pieces_to_read)
+        finally:
+            data_cursor.close()
+
+    def _read_file(self, log_reading, data_cursor=None, pieces_to_read=None):
         lgr = SimpleLogger(log_reading)
         lgr.print("\nFile reading started...")
 
         self._parsed_header = collections.OrderedDict()
         self._parsed_data = collections.OrderedDict()
-        header_generator = self._create_header_generator(1)
-        data_generator = self._create_data_generator(1)
+        remaining = set(pieces_to_read) if pieces_to_read is not None else None
+        header_cursor = self._create_header_cursor()
+        if data_cursor is None:
+            data_cursor = self._create_data_cursor()
 
         current_piece = ""
+        current_cursor = header_cursor
         try:
             for piece_object in _header_structure:
+                if remaining is not None and len(remaining) == 0:
+                    break
+                self._check_cancelled()
                 # Rerender pieces dict each time - changes constantly
                 pieces = collections.OrderedDict(**self._parsed_header, **self._parsed_data)
                 piece = piece_object(self.parser)
@@ -125,28 +427,39 @@ class AoE2Scenario:
                 current_piece = piece_name
 
                 lgr.print("\tReading " + piece_name + "...", replace_line=True)
-                piece.set_data_from_generator(header_generator, pieces)
+                piece.set_data_from_cursor(header_cursor, pieces)
                 lgr.print("\tReading " + piece_name + " finished successfully.", replace_line=True)
                 lgr.print()
+                if remaining is not None:
+                    remaining.discard(piece_name)
 
             for piece_object in _file_structure:
+                if remaining is not None and len(remaining) == 0:
+                    break
+                self._check_cancelled()
                 # Rerender pieces dict each time - changes constantly
                 pieces = collections.OrderedDict(**self._parsed_header, **self._parsed_data)
                 piece = piece_object(self.parser)
                 piece_name = type(piece).__name__
                 self._parsed_data[piece_name] = piece
                 current_piece = piece_name
+                current_cursor = data_cursor
 
                 lgr.print("\tReading " + piece_name + "...", replace_line=True)
-                piece.set_data_from_generator(data_generator, pieces)
+                piece.set_data_from_cursor(data_cursor, pieces)
                 lgr.print("\tReading " + piece_name + " finished successfully.", replace_line=True)
                 lgr.print()
+                if remaining is not None:
+                    remaining.discard(piece_name)
         except Exception as e:
-            print(f"\n[{e.__class__.__name__}] [EXIT] AoE2Scenario._read_file: \n\tPiece: {current_piece}\n")
+            if not log_reading or isinstance(e, CancelledError):
+                raise e
+            print(f"\n[{e.__class__.__name__}] [EXIT] AoE2Scenario._read_file: \n\tPiece: {current_piece}"
+                  f"\n\tPosition: {current_cursor.tell()} ({'header' if current_cursor is header_cursor else 'data'})\n")
             print("Writing ErrorFile...")
             self._debug_byte_structure_to_file(
                 filename="../ErrorFile",
-                generator_for_trail=data_generator,
+                cursor_for_trail=data_cursor,
                 log_debug_write=True
             )
             time.sleep(1)
@@ -155,82 +468,165 @@ class AoE2Scenario:
             raise e
         lgr.print("File reading finished successfully.")
 
-    def write_to_file(self, filename, commit_on_write=True, log_writing=True, log_reconstructing=True):
+    def write_to_file(self, filename, commit_on_write=True, log_writing=True, log_reconstructing=True,
+                      compression="default", compression_level=None, compression_mem_level=None,
+                      compression_strategy=None):
+        """
+        Write the scenario to a file.
+
+        Args:
+            filename (str): The path to write the scenario to
+            commit_on_write (bool): If the managers should be committed to the pieces before writing
+            log_writing (bool): If the writing progress should be printed
+            log_reconstructing (bool): If the committing of the managers should be printed
+            compression (str): The compression preset to use. One of: "default", "fast" or "max"
+                (See: `compression_presets`). "fast" saves a lot faster at the cost of a (slightly) larger file.
+            compression_level (int): Overrides the zlib compression level of the preset (0-9)
+            compression_mem_level (int): Overrides the zlib memLevel of the preset (1-9)
+            compression_strategy (int): Overrides the zlib strategy of the preset (like: `zlib.Z_FILTERED`)
+        """
         self._write_from_structure(
             filename,
             log_writing=log_writing,
             log_reconstructing=log_reconstructing,
             commit_on_write=commit_on_write,
+            compression_settings=get_compression_settings(
+                compression, compression_level, compression_mem_level, compression_strategy
+            ),
         )
 
+    def write(self, file, commit_on_write=True, log_writing=True, log_reconstructing=True, compression="default",
+              compression_level=None, compression_mem_level=None, compression_strategy=None):
+        """
+        Write the scenario to a binary file object (like an opened file, `io.BytesIO` or a response body). See
+        `write_to_file` for the other arguments.
+        """
+        self._write_to_stream(
+            file,
+            log_writing=log_writing,
+            log_reconstructing=log_reconstructing,
+            commit_on_write=commit_on_write,
+            compression_settings=get_compression_settings(
+                compression, compression_level, compression_mem_level, compression_strategy
+            ),
+        )
+
+    def to_bytes(self, **kwargs) -> bytes:
+        """Returns the content of the scenario file. Accepts the same arguments as `write` (except for file)."""
+        buffer = io.BytesIO()
+        self.write(buffer, **kwargs)
+        return buffer.getvalue()
+
     def _write_from_structure(self,
                               filename,
                               write_in_bytes=True,
                               compress=True,
                               commit_on_write=True,
                               log_writing=True,
-                              log_reconstructing=True):
-        if hasattr(self, '_object_manager') and commit_on_write:
+                              log_reconstructing=True,
+                              compression_settings=None):
+        # The file is written to a (unique) temporary file next to it first, which is moved in place when writing
+        # succeeded. So a failed write doesn't leave a broken file behind. Symlinks are followed, so the file they point
+        # to is replaced instead of the link itself.
+        filename = os.path.realpath(filename)
+        file_descriptor, temp_filename = _create_temp_file(filename)
+        try:
+            with os.fdopen(file_descriptor, "wb" if write_in_bytes else "w") as file:
+                self._write_to_stream(file, write_in_bytes, compress, commit_on_write, log_writing,
+                                      log_reconstructing, compression_settings)
+            _copy_file_mode(filename, temp_filename)
+            os.replace(temp_filename, filename)
+        except BaseException:
+            if os.path.exists(temp_filename):
+                os.remove(temp_filename)
+            raise
+
+    def _write_to_stream(self,
+                         file,
+                         write_in_bytes=True,
+                         compress=True,
+                         commit_on_write=True,
+                         log_writing=True,
+                         log_reconstructing=True,
+                         compression_settings=None):
+        if self.is_partial:
+            raise ValueError("Scenarios which were not read completely cannot be written")
+        if self._object_manager is not None and commit_on_write:
             self._object_manager.reconstruct(log_reconstructing=log_reconstructing)
         lgr = SimpleLogger(log_writing)
         lgr.print("\nFile writing from structure started...")
 
         pieces = collections.OrderedDict(**self._parsed_header, **self._parsed_data)
+        self._write_pieces(file, pieces, lgr, write_in_bytes, compress, compression_settings)
+        lgr.print("File writing finished successfully.")
 
-        byte_header_list = []
-        byte_data_list = []
+    def _write_pieces(self, file, pieces, lgr, write_in_bytes, compress, compression_settings=None):
+        """
+        Write all pieces to the given file. Every data piece is serialized into the same buffer and passed to the
+        compressor (and the compressed bytes to the file), the buffer is cleared before the next piece is serialized.
+        So the uncompressed data isn't kept in memory as a whole, and writing doesn't keep a copy of the pieces.
+        """
+        # Bytes are collected when writing in text as the textual hex is based on the position in the entire output
+        text_buffer = bytearray()
+
+        def write(data):
+            if write_in_bytes:
+                file.write(data)
+            else:
+                text_buffer.extend(data)
+
+        byte_header = bytearray()
         for key in self._parsed_header:
             lgr.print("\twriting " + key + "...", replace_line=True)
-            for retriever in self._parsed_header[key].retrievers:
-                byte_header_list.append(parser.retriever_to_bytes(retriever, pieces))
+            self._parsed_header[key].write_bytes(byte_header, pieces)
             lgr.print("\twriting " + key + " finished successfully.", replace_line=True)
             lgr.print()
+        write(byte_header)
+        if not write_in_bytes:
+            file.write(create_textual_hex(text_buffer.hex()))
+            text_buffer.clear()
 
+        deflate_obj = create_compressor(compression_settings) if compress else None
+        piece_buffer = bytearray()
         for key in self._parsed_data:
-            lgr.print("\twriting " + key + "...", replace_line=True)
-            for retriever in self._parsed_data[key].retrievers:
+            self._check_cancelled()
+            piece = self._parsed_data[key]
+            lgr.print("\twriting " + key + ("..." if piece.is_dirty else " (unchanged)..."), replace_line=True)
+            # Unchanged pieces are passed to the compressor as they were read, without copying them into the buffer
+            piece_bytes = piece._get_clean_bytes()
+            if piece_bytes is None:
                 try:
-                    byte_data_list.append(parser.retriever_to_bytes(retriever, pieces))
+                    piece.write_bytes(piece_buffer, pieces)
                 except AttributeError as e:
-                    print("AttributeError occurred while writing '" + key + "' > '" + retriever.name + "'")
+                    print("AttributeError occurred while writing '" + key + "'")
                     print("\n\n\nAn error occurred. Writing failed.")
                     raise e
+                piece_bytes = piece_buffer
+            write(deflate_obj.compress(piece_bytes) if compress else piece_bytes)
+            piece_buffer.clear()
             lgr.print("\twriting " + key + " finished successfully.", replace_line=True)
             lgr.print()
 
-        file = open(filename, "wb" if write_in_bytes else "w")
-
-        byte_header = b''.join(byte_header_list)
-        byte_data = b''.join(byte_data_list)
-
-        file.write(byte_header if write_in_bytes else create_textual_hex(byte_header.hex()))
         if compress:
-            lgr.print("\tCompressing...", replace_line=True)
-            # https://stackoverflow.com/questions/3122145/zlib-error-error-3-while-decompressing-incorrect-header-check/22310760#22310760
-            deflate_obj = zlib.compressobj(9, zlib.DEFLATED, -zlib.MAX_WBITS)
-            compressed = deflate_obj.compress(b''.join(byte_data_list)) + deflate_obj.flush()
-            file.write(compressed if write_in_bytes else create_textual_hex(compressed.hex()))
-            lgr.print("\tCompressing finished successfully.", replace_line=True)
-            lgr.print()
-        else:
-            file.write(byte_data if write_in_bytes else create_textual_hex(byte_data.hex()))
-
-        file.close()
-        lgr.print("File writing finished successfully.")
+            write(deflate_obj.flush())
+        if not write_in_bytes:
+            file.write(create_textual_hex(text_buffer.hex()))
 
-    def _create_header_generator(self, chunk_size):
-        return generator.create_generator(self._file_header, chunk_size)
+    def _create_header_cursor(self):
+        return ByteCursor(self._file_header)
 
-    def _create_data_generator(self, chunk_size):
-        return generator.create_generator(self._decompressed_file_data, chunk_size)
+    def _create_data_cursor(self):
+        return ByteCursor(self._decompressed_file_data)
 
-    def _create_file_generator(self, chunk_size):
-        return generator.create_generator(self._file, chunk_size)
+    def _create_file_cursor(self):
+        return ByteCursor(self._file)
 
-    def _compute_header_length(self):
+    def _compute_header_length(self, file_data=None):
+        parser_obj = self.parser if self.parser is not None else parser.Parser()
         return parser.calculate_length(
-            self._create_file_generator(1),
-            FileHeaderPiece(parser.Parser()).retrievers
+            self._create_file_cursor() if file_data is None else ByteCursor(file_data),
+            FileHeaderPiece(parser_obj).retrievers,
+            parser_obj
         )
 
     """ #############################################
@@ -244,24 +640,21 @@ class AoE2Scenario:
         selected_parts = []
         for t in datatype:
             if t == "f":
+                if self._file is None:
+                    raise ValueError("The source file is not kept in memory when it's read using mmap")
                 selected_parts.append(self._file)
             elif t == "h":
                 selected_parts.append(self._file_header)
             elif t == "d":
                 selected_parts.append(self._decompressed_file_data)
-        parts = None
-        for part in selected_parts:
-            if parts is None:
-                parts = part
-                continue
-            parts += part
+        parts = b''.join(selected_parts)
         file.write(parts if write_bytes else create_textual_hex(parts.hex()))
         file.close()
         print("File writing finished successfully.")
 
-    def _debug_byte_structure_to_file(self, filename, generator_for_trail=None, log_debug_write=True, commit=False):
+    def _debug_byte_structure_to_file(self, filename, cursor_for_trail=None, log_debug_write=True, commit=False):
         """ Used for debugging - Writes structure from read file to the filesystem in a easily readable manner. """
-        if commit and hasattr(self, '_object_manager'):
+        if commit and self._object_manager is not None:
             # self._object_manager.reconstruct(log_debug_write)
             self._write_from_structure(filename, log_writing=log_debug_write, log_reconstructing=log_debug_write)
 
@@ -282,29 +675,10 @@ class AoE2Scenario:
                 lgr.print("\tWriting " + key + " finished successfully.", replace_line=True)
                 lgr.print()
 
-            if generator_for_trail is not None:
+            if cursor_for_trail is not None:
                 lgr.print("\tWriting trail...", replace_line=True)
-                trail_length = -1  # -1 == inf
-                try:
-                    trail = b''
-                    i = 0
-                    while i != trail_length:
-                        trail += generator.repeat_generator(
-                            generator=generator_for_trail,
-                            run_times=1,
-                            intended_stop_iteration=True,
-                            return_bytes=True
-                        )
-                        i += 1
-                except StopIteration:
-                    pass  # Expected, if trail is not present or shorter than {trail_length} bytes
-                if i != 0:
-                    i += 1
-                if i == trail_length:
-                    i = str(i) + '+'
-                if trail_length == -1:
-                    trail_length = i
-                result.append(f"\n\n{'#' * 27} TRAIL ({i}/{trail_length})\n\n")
+                trail = bytes(cursor_for_trail.peek(cursor_for_trail.remaining()))
+                result.append(f"\n\n{'#' * 27} TRAIL ({len(trail)}/{len(trail)})\n\n")
                 result.append(helper.create_textual_hex(trail.hex(), space_distance=2, enter_distance=24))
                 lgr.print("\tWriting trail finished successfully.", replace_line=True)
                 lgr.print()
@@ -332,6 +706,9 @@ _file_structure: List[Type[AoE2Piece]] = [
     FilesPiece,
 ]
 
+# Invalid dependencies (cycles or missing targets) are reported when the library is imported instead of while parsing
+compile_dependency_plans()
+
 # Define piece names
 data_header_piece = "DataHeaderPiece"
 messages_piece = "MessagesPiece"
@@ -345,3 +722,187 @@ map_piece = "MapPiece"
 units_piece = "UnitsPiece"
 trigger_piece = "TriggerPiece"
 files_piece = "FilesPiece"
+
+
+def _get_piece_names(pieces):
+    """Returns the set of piece names for the given list of piece names or classes. None stays None."""
+    if pieces is None:
+        return None
+    names = {piece if type(piece) is str else piece.__name__ for piece in pieces}
+    known_names = [piece.__name__ for piece in _header_structure + _file_structure]
+    unknown_names = names.difference(known_names)
+    if unknown_names:
+        raise ValueError(f"Unknown piece(s): {', '.join(sorted(unknown_names))}. Available: {', '.join(known_names)}")
+    return names
+
+
+# The zlib (level, memLevel, strategy) of the compression presets which can be used with `write_to_file`
+compression_presets = {
+    "default": (9, zlib.DEF_MEM_LEVEL, zlib.Z_DEFAULT_STRATEGY),
+    "fast": (1, zlib.DEF_MEM_LEVEL, zlib.Z_DEFAULT_STRATEGY),
+    "max": (9, 9, zlib.Z_DEFAULT_STRATEGY),
+}
+
+
+def get_compression_settings(preset="default", level=None, mem_level=None, strategy=None):
+    """Returns the (level, memLevel, strategy) of the given preset. Values which are given override the preset."""
+    if preset not in compression_presets:
+        raise ValueError(f"Unknown compression preset: '{preset}'. Available: {', '.join(compression_presets)}")
+    preset_level, preset_mem_level, preset_strategy = compression_presets[preset]
+    return (
+        preset_level if level is None else level,
+        preset_mem_level if mem_level is None else mem_level,
+        preset_strategy if strategy is None else strategy,
+    )
+
+
+def create_compressor(compression_settings=None):
+    """Returns a raw DEFLATE compressor (as used in scenario files) with the given (level, memLevel, strategy)"""
+    level, mem_level, strategy = compression_settings or compression_presets["default"]
+    # https://stackoverflow.com/questions/3122145/zlib-error-error-3-while-decompressing-incorrect-header-check/22310760#22310760
+    return zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS, mem_level, strategy)
+
+
+# The maximum amount of scenarios which are parsed (or written) at the same time by `aload` and `asave` (when no
+# executor is given). Only used when the pool is created, so it has to be set before the first call.
+async_workers = min(4, os.cpu_count() or 1)
+_async_executor = None
+
+
+def _get_async_executor():
+    global _async_executor
+    if _async_executor is None:
+        _async_executor = ThreadPoolExecutor(max_workers=async_workers, thread_name_prefix="AoE2Scenario")
+    return _async_executor
+
+
+def _create_temp_file(filename):
+    """
+    Create a new temporary file (`<filename>.<random>.tmp`) next to the given file. It's created with the default mode
+    for new files (0o666 limited by the current umask), like the file itself would be when it doesn't exist yet.
+
+    Returns:
+        The file descriptor (opened for writing) and the path of the temporary file
+    """
+    flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0)
+    while True:
+        temp_filename = f"{filename}.{os.urandom(6).hex()}.tmp"
+        try:
+            return os.open(temp_filename, flags, 0o666), temp_filename
+        except FileExistsError:
+            continue
+
+
+def _copy_file_mode(filename, temp_filename):
+    """Give the temporary file the mode of the file it replaces. New files keep the mode they were created with."""
+    try:
+        mode = stat.S_IMODE(os.stat(filename).st_mode)
+    except FileNotFoundError:
+        return
+    os.chmod(temp_filename, mode)
+
+
+def _read_file_content(filename):
+    with open(filename, "rb") as file:
+        return file.read()
+
+
+class _PieceCopies(dict):
+    """
+    The pieces of a scenario which are copied when they're first used. A piece is copied by reading it again from its
+    bytes. Only the copied pieces are in the dict. Used to commit objects without changing the original pieces.
+    """
+
+    def __init__(self, pieces, piece_bytes):
+        """
+        Args:
+            pieces (OrderedDict[str, AoE2Piece]): The original pieces
+            piece_bytes (OrderedDict[str, bytes]): The bytes of every piece
+        """
+        super().__init__()
+        self._pieces = pieces
+        self._piece_bytes = piece_bytes
+
+    def __missing__(self, name):
+        piece = type(self._pieces[name])(parser.Parser(log_messages=False))
+        # The values of the original pieces are the same, so those are used for the dependencies while reading
+        piece.set_data_from_cursor(ByteCursor(self._piece_bytes[name]), self._pieces)
+        self[name] = piece
+        return piece
+
+
+def _save_object_states(objects):
+    """
+    Returns the pieces and instance number history of the given objects and all objects inside them, and the state
+    of the terrain grid. Committing changes these (See: `RetrieverObjectLink.commit` and `TerrainGrid.commit`).
+    """
+    states = []
+    pending = list(objects)
+    while pending:
+        value = pending.pop()
+        if type(value) is TerrainGrid:
+            states.append((value, value._raw, value._committed_data))
+            continue
+        states.append((value, value._pieces, value._instance_number_history))
+        for item in value.__dict__.values():
+            if type(item) is list:
+                _extend_with_objects(pending, item)
+            elif isinstance(item, (AoE2Object, TerrainGrid)):
+                pending.append(item)
+    return states
+
+
+def _extend_with_objects(pending, values):
+    """Add the objects in the (nested) list to pending. Lists hold a single type, so other lists are skipped."""
+    if len(values) == 0:
+        return
+    if type(values[0]) is list:
+        for item in values:
+            _extend_with_objects(pending, item)
+    elif isinstance(values[0], AoE2Object):
+        pending.extend(values)
+
+
+def _restore_object_states(states):
+    """Restore the states returned by `_save_object_states`"""
+    for value, first, second in states:
+        if isinstance(value, TerrainGrid):
+            value._raw, value._committed_data = first, second
+        else:
+            value._pieces, value._instance_number_history = first, second
+
+
+def _restore_scenario(scenario_class, read_mode, header, body, piece_names):
+    """Recreate a pickled scenario (See: `AoE2Scenario.__reduce__`). The pieces are read on first use."""
+    scenario = scenario_class()
+    scenario.read_mode = read_mode
+    scenario.parser = parser.Parser(log_messages=False)
+    for name in ['_parsed_header', '_parsed_data', '_object_manager']:
+        del scenario.__dict__[name]
+    scenario._unpickled_state = (header, body, piece_names)
+    return scenario
+
+
+class FileResult(NamedTuple):
+    """The result of a single file processed by `AoE2Scenario.map_files`"""
+    path: str
+    # The value returned by the function (None when an error occurred)
+    value: Any = None
+    # The formatted traceback when an error occurred, None otherwise
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def _map_file(scenario_class, path, fn, output_path, kwargs) -> FileResult:
+    """Process a single file for `AoE2Scenario.map_files`. This runs in the worker processes."""
+    try:
+        scenario = scenario_class.from_file(path, **{'log_reading': False, 'log_parsing': False, **kwargs})
+        value = fn(scenario)
+        if output_path is not None:
+            scenario.write_to_file(output_path, log_writing=False, log_reconstructing=False)
+        return FileResult(path, value)
+    except Exception:
+        return FileResult(path, error=traceback.format_exc())
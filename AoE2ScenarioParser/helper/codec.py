@@ -0,0 +1,144 @@
+import struct
+from functools import lru_cache
+
+from AoE2ScenarioParser.helper.bytes_to_x import bytes_to_fixed_chars, bytes_to_str, fixed_chars_to_bytes, \
+    str_to_bytes
+
+types = [
+    "s",  # Signed int
+    "u",  # Unsigned int
+    "f",  # FloatingPoint
+    "c",  # Character string
+    "str",  # Variable length string
+    "data",  # Data (Can be changed by used using bytes_to_x functions)
+    "bytes",  # Raw bytes, the repeat is the amount of bytes (Read and written as a single bytes object)
+    "struct",  # AoE2Struct subclass
+]
+
+_int_formats = {1: 'b', 2: 'h', 4: 'i', 8: 'q'}
+_float_formats = {4: 'f', 8: 'd'}
+
+
+class DataTypeCodec:
+    """ The compiled form of a DataType var. Holds the resolved type & length and the functions used for reading
+    and writing a single value of that type. Use `get_codec` to retrieve a (cached) codec for a var.
+    """
+    __slots__ = ('var', 'var_type', 'var_len', 'struct', 'is_struct', 'read', 'to_bytes')
+
+    def __init__(self, var):
+        self.var = var
+        self.var_type, self.var_len = _parse_var(var)
+        self.is_struct = self.var_type == "struct"
+        self.struct = _create_struct(self.var_type, self.var_len)
+
+        if self.struct is not None:
+            self.read = self._read_struct_value
+            self.to_bytes = self._struct_value_to_bytes
+        elif self.var_type in ["s", "u"]:
+            self.read = self._read_int
+            self.to_bytes = self._int_to_bytes
+        elif self.var_type == "c":
+            self.read = self._read_fixed_chars
+            self.to_bytes = self._fixed_chars_to_bytes
+        elif self.var_type in ["data", "bytes"]:
+            self.read = self._read_data
+            self.to_bytes = self._data_to_bytes
+        elif self.var_type == "str":
+            self.read = self._read_str
+            self.to_bytes = self._str_to_bytes
+        else:
+            self.read = self._not_readable
+            self.to_bytes = self._not_readable
+
+    def read_many(self, cursor, repeat):
+        """
+        Read `repeat` values at once. Fixed size numeric values are unpacked in a single call. For the 'bytes' type
+        `repeat` bytes are read and returned as a single bytes object.
+        """
+        if self.var_type == "bytes":
+            return bytes(cursor.read(repeat))
+        if self.struct is not None and repeat > 1:
+            return [value for (value,) in self.struct.iter_unpack(cursor.read(self.var_len * repeat))]
+        return [self.read(cursor) for _ in range(repeat)]
+
+    def _read_struct_value(self, cursor):
+        return self.struct.unpack(cursor.read(self.var_len))[0]
+
+    def _struct_value_to_bytes(self, value, retriever=None):
+        return self.struct.pack(value)
+
+    def _read_int(self, cursor):
+        return int.from_bytes(cursor.read(self.var_len), "little", signed=self.var_type == "s")
+
+    def _int_to_bytes(self, value, retriever=None):
+        return value.to_bytes(self.var_len, "little", signed=self.var_type == "s")
+
+    def _read_fixed_chars(self, cursor):
+        return bytes_to_fixed_chars(bytes(cursor.read(self.var_len)))
+
+    def _fixed_chars_to_bytes(self, value, retriever=None):
+        return fixed_chars_to_bytes(value)
+
+    def _read_data(self, cursor):
+        return bytes(cursor.read(self.var_len))
+
+    def _data_to_bytes(self, value, retriever=None):
+        return value
+
+    def _read_str(self, cursor):
+        string_length = int.from_bytes(cursor.read(self.var_len), "little", signed=True)
+        return bytes_to_str(bytes(cursor.read(string_length)))
+
+    def _str_to_bytes(self, value, retriever=None):
+        byte_string = str_to_bytes(value, retriever)
+        return len(byte_string).to_bytes(self.var_len, "little", signed=True) + byte_string
+
+    def _not_readable(self, *args):
+        raise TypeError(f"Values of type '{self.var_type}' cannot be read or written directly")
+
+    def __repr__(self):
+        return f"[DataTypeCodec] {self.var_type}{self.var_len}"
+
+
+@lru_cache(maxsize=None)
+def get_codec(var) -> DataTypeCodec:
+    """Returns the codec for the given DataType var. Every var is only compiled once."""
+    return DataTypeCodec(var)
+
+
+def _parse_var(var):
+    if isinstance(var, type):
+        return "struct", 0
+
+    var_type = ""
+    var_len = ""
+
+    for char in var:
+        if char.isnumeric():
+            var_len += char
+        else:
+            var_type += char
+
+    if var_type == "":
+        var_type = "data"
+
+    if var_len == "":
+        var_len = 0
+    else:
+        var_len = int(var_len)
+
+    assert var_type in types
+
+    if var_type not in ["c", "data", "bytes"]:
+        var_len = int(var_len / 8)
+
+    return var_type, var_len
+
+
+def _create_struct(var_type, var_len):
+    if var_type in ["s", "u"] and var_len in _int_formats:
+        fmt = _int_formats[var_len]
+        return struct.Struct("<" + (fmt.upper() if var_type == "u" else fmt))
+    elif var_type == "f" and var_len in _float_formats:
+        return struct.Struct("<" + _float_formats[var_len])
+    return None
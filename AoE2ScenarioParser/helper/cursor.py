@@ -0,0 +1,131 @@
+import zlib
+
+
+class ByteCursor:
+    """ A read cursor over a bytes-like object.
+
+    All reads return zero-copy ``memoryview`` slices of the underlying buffer. When a value needs to outlive the buffer
+    (like raw data or strings) it should be converted using ``bytes(...)`` by the caller.
+    """
+
+    def __init__(self, buffer, position=0):
+        """
+        Args:
+            buffer (Union[bytes, bytearray, memoryview]): The buffer to read from
+            position (int): The initial position of the cursor
+        """
+        self._buffer = buffer
+        self._view = memoryview(buffer)
+        self._length = len(self._view)
+        self._position = position
+
+    def read(self, n):
+        """
+        Read n bytes and move the cursor forward.
+
+        Raises:
+            StopIteration: When less than n bytes are remaining
+        """
+        start = self._position
+        end = start + n
+        if end > self._length:
+            raise StopIteration(f"Unable to read {n} bytes at position {start}. Only {self.remaining()} remaining.")
+        self._position = end
+        return self._view[start:end]
+
+    def peek(self, n=1):
+        """Return the next n (or less if not available) bytes without moving the cursor."""
+        return self._view[self._position:self._position + n]
+
+    @property
+    def buffer(self):
+        """The object this cursor reads from"""
+        return self._buffer
+
+    def tell(self):
+        return self._position
+
+    def seek(self, position):
+        if not 0 <= position <= self._length:
+            raise ValueError(f"Position {position} is outside of the buffer (length: {self._length})")
+        self._position = position
+
+    def remaining(self):
+        return self._length - self._position
+
+    def close(self):
+        """Release the view on the buffer. The cursor can't be used afterwards."""
+        self._view.release()
+
+    def __repr__(self):
+        return f"[ByteCursor] {self._position}/{self._length}"
+
+
+class ZlibStreamCursor(ByteCursor):
+    """ A read cursor over raw DEFLATE (zlib without header) compressed data.
+
+    The data is decompressed while it is read. Only the compressed input needed to satisfy a read is decompressed, so
+    reading can stop early without decompressing everything. The decompressed data is appended to a single
+    ``bytearray`` (See: ``buffer``). Reads return zero-copy ``memoryview`` slices of this buffer, like ``ByteCursor``.
+    The buffer can only grow while none of these views exist, so views have to be released (or converted) before the
+    cursor reads further.
+    """
+
+    def __init__(self, compressed, chunk_size=2 ** 16):
+        """
+        Args:
+            compressed (Union[bytes, memoryview]): The compressed data
+            chunk_size (int): The amount of compressed bytes which are decompressed at a time
+        """
+        super().__init__(bytearray())
+        self._view = None
+        self._compressed = memoryview(compressed)
+        self._compressed_position = 0
+        self._chunk_size = chunk_size
+        self._decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+
+    @property
+    def is_exhausted(self):
+        """True when all compressed data has been decompressed"""
+        return self._decompressor.eof or self._compressed_position >= len(self._compressed)
+
+    def read(self, n):
+        start = self._position
+        end = start + n
+        if end > self._length:
+            self._decompress_until(end)
+            if end > self._length:
+                raise StopIteration(f"Unable to read {n} bytes at position {start}. Only {self.remaining()} remaining.")
+        self._position = end
+        return memoryview(self._buffer)[start:end]
+
+    def peek(self, n=1):
+        self._decompress_until(self._position + n)
+        return memoryview(self._buffer)[self._position:self._position + n]
+
+    def seek(self, position):
+        self._decompress_until(position)
+        super().seek(position)
+
+    def remaining(self):
+        self._decompress_until(None)
+        return super().remaining()
+
+    def close(self):
+        """Release the view on the compressed data (so a memory-map can be closed). Decompressed data is kept."""
+        self._compressed.release()
+
+    def _decompress_until(self, length):
+        """Decompress chunks until the buffer has the given length. All data is decompressed when length is None."""
+        while (length is None or self._length < length) and not self.is_exhausted:
+            chunk = self._compressed[self._compressed_position:self._compressed_position + self._chunk_size]
+            self._compressed_position += len(chunk)
+            try:
+                self._buffer += self._decompressor.decompress(chunk)
+            except BufferError:
+                raise BufferError("A view returned by the cursor is still in use, the buffer can't grow") from None
+            self._length = len(self._buffer)
+
+    def __repr__(self):
+        return f"[ZlibStreamCursor] {self._position}/{self._length} " \
+               f"(compressed: {self._compressed_position}/{len(self._compressed)})"
@@ -1,3 +1,10 @@
+from AoE2ScenarioParser.helper.codec import get_codec
+
+# Variants are only cached for repeats up to this value. Larger repeats (like the amount of triggers or the length of
+# an image) differ per scenario, caching those would keep every repeat ever seen in memory.
+max_cached_repeat = 256
+
+
 class DataType:
     """ A class to identify what data you want to retrieve. This class has two parameters which are very useful.
         var:
@@ -11,6 +18,8 @@ class DataType:
                 str: Character string of variable length.
                     This type will read the number in bits given and parse it as an int. The number retrieved from it
                     will be the amount of bytes read as a character string.
+                bytes: Raw bytes. The repeat is the amount of bytes, which are read and written as a single bytes
+                    object (for large payloads like images).
             - Another option for the var parameter is to give a Struct (not Python struct) subclass as var. This will
             parse all DataType values in the Struct subclass. This can be handy for when blocks of data are repeated.
             - Per data type you can save how large the value is bit/byte wise. While this may be confusing not all
@@ -27,13 +36,48 @@ class DataType:
                                             be loaded in it's place.
         repeat:
             The amount of times the above datatype needs to be repeated
+
+        The var is compiled once into a (shared) DataTypeCodec which is available as the codec attribute.
+
+        DataTypes of retrievers are shared between all instances of a piece (or struct) class, so their repeat can't be
+        changed. A piece uses another (also shared) DataType for a different repeat instead (See: `with_repeat`).
     """
+    __slots__ = ('var', 'codec', '_repeat', 'log_value', 'shared', '_debug_retriever_name', '_variants')
 
     def __init__(self, var="0", repeat=1, log_value=False):
         self.var = var
+        self.codec = get_codec(var)
         self._repeat = repeat
         self.log_value = log_value
+        # Shared datatypes are used by the retrievers of all instances of a piece class (See: PieceSchema)
+        self.shared = False
         self._debug_retriever_name = "???"
+        # The DataTypes with the same var but another repeat, by repeat (See: with_repeat)
+        self._variants = None
+
+    def with_repeat(self, repeat):
+        """
+        Returns a shared DataType with the same var and the given repeat. It's created once per repeat, for repeats up
+        to `max_cached_repeat`.
+        """
+        if repeat == self._repeat:
+            return self
+        if type(repeat) is not int or not 0 <= repeat <= max_cached_repeat:
+            # Dependencies can (temporarily) set other values (like a list) as repeat, those aren't cached either
+            datatype = DataType(self.var, repeat, self.log_value)
+            datatype.shared = True
+            datatype._debug_retriever_name = self._debug_retriever_name
+            return datatype
+        if self._variants is None:
+            self._variants = {self._repeat: self}
+        datatype = self._variants.get(repeat)
+        if datatype is None:
+            datatype = DataType(self.var, repeat, self.log_value)
+            datatype.shared = True
+            datatype._debug_retriever_name = self._debug_retriever_name
+            datatype._variants = self._variants
+            datatype = self._variants.setdefault(repeat, datatype)
+        return datatype
 
     def to_simple_string(self):
         return str(self._repeat) + " * " + (self.var if type(self.var) is str else self.var.__name__)
@@ -49,6 +93,8 @@ class DataType:
 
     @repeat.setter
     def repeat(self, value):
+        if self.shared:
+            raise ValueError("The repeat of a shared DataType cannot be changed. Use: BoundRetriever.set_repeat()")
         if self.log_value:
             print(f"[DataType] {self._debug_retriever_name} Repeat set to {value} from: " + self.to_simple_string())
         self._repeat = value
@@ -0,0 +1,132 @@
+from typing import Dict, Tuple
+
+from AoE2ScenarioParser.helper.retriever_dependency import DependencyAction
+
+states = ("construct", "commit", "refresh")
+
+# All piece (and struct) classes by name, used to resolve dependency targets. (See: `AoE2Piece.__init_subclass__`)
+_piece_classes: Dict[str, type] = {}
+# The compiled plans by (piece class, retriever name, state)
+_plans: Dict[tuple, Tuple['DependencyStep', ...]] = {}
+
+
+class DependencyStep:
+    """ A single SET_VALUE or SET_REPEAT action of a dependency plan.
+
+    The targets of REFRESH and REFRESH_SELF dependencies are resolved when the plan is compiled, so a plan only consists
+    of steps which set a value or repeat. `piece` and the pieces in `sources` are either "self" (the retriever list the
+    plan is executed on) or the name of a piece.
+    """
+    __slots__ = ('piece', 'name', 'action', 'sources', 'dependency_eval')
+
+    def __init__(self, piece, name, action, sources, dependency_eval):
+        self.piece = piece
+        self.name = name
+        self.action = action
+        self.sources = sources
+        self.dependency_eval = dependency_eval
+
+    def __repr__(self):
+        return f"[DependencyStep] {self.action.name} {self.piece}.{self.name} <- {self.sources}"
+
+
+class DependencyPlanError(ValueError):
+    pass
+
+
+def register_piece_class(piece_class):
+    _piece_classes[piece_class.__name__] = piece_class
+
+
+def get_dependency_plan(piece_class, name, state):
+    """
+    Returns the plan of the dependency of the given retriever and state. The plan is compiled the first time it's
+    requested (or when `compile_dependency_plans` is called).
+    """
+    key = (piece_class, name, state)
+    plan = _plans.get(key)
+    if plan is None:
+        plan = _plans[key] = _compile(piece_class, name, state, "self", [])
+    return plan
+
+
+def compile_dependency_plans():
+    """
+    Compile the dependency plans of all registered classes. This makes sure that invalid dependencies (missing targets
+    or cycles) raise a DependencyPlanError immediately instead of when the dependency is used while reading or writing.
+    """
+    for piece_class in list(_piece_classes.values()):
+        for name, dependencies in piece_class.dependencies.items():
+            for state in dependencies:
+                if state not in [f"on_{s}" for s in states]:
+                    raise DependencyPlanError(f"Unknown dependency state '{state}' in {piece_class.__name__}.{name}")
+                get_dependency_plan(piece_class, name, state[3:])
+
+
+def _compile(piece_class, name, state, piece, stack):
+    """
+    Flatten the dependency into a tuple of steps in the order they have to be executed.
+
+    Args:
+        piece_class (type): The class the retriever belongs to
+        name (str): The name of the retriever
+        state (str): One of: construct, commit or refresh
+        piece (str): How the retriever list of the piece_class is reached from the root ("self" or a piece name)
+        stack (list): The (class, name, state) of the dependencies currently being compiled, used to detect cycles
+    """
+    if state not in states:
+        raise ValueError("State must be any of: construct, commit or refresh")
+    location = (piece_class, name, state)
+    if location in stack:
+        cycle = " -> ".join(f"{c.__name__}.{n} ({s})" for c, n, s in stack[stack.index(location):] + [location])
+        raise DependencyPlanError(f"Dependency cycle: {cycle}")
+
+    dependencies = piece_class.dependencies.get(name, {}).get(f"on_{state}")
+    if dependencies is None:
+        if state == "refresh":
+            raise DependencyPlanError(f"{piece_class.__name__}.{name} is refreshed but has no 'on_refresh' dependency")
+        return ()
+
+    stack.append(location)
+    steps = []
+    for dependency in dependencies if type(dependencies) is list else [dependencies]:
+        if dependency is None:
+            continue
+        action = dependency.dependency_type
+        targets = _resolve_targets(piece_class, name, dependency.dependency_target, piece)
+        if action == DependencyAction.REFRESH_SELF:
+            steps += _compile(piece_class, name, "refresh", piece, stack)
+        elif action == DependencyAction.REFRESH:
+            for target_class, target_piece, target_name in targets:
+                steps += _compile(target_class, target_name, "refresh", target_piece, stack)
+        elif action in [DependencyAction.SET_VALUE, DependencyAction.SET_REPEAT]:
+            sources = tuple((target_piece, target_name) for _, target_piece, target_name in targets)
+            steps.append(DependencyStep(piece, name, action, sources, dependency.dependency_eval))
+    stack.pop()
+    return tuple(steps)
+
+
+def _resolve_targets(piece_class, name, dependency_target, piece):
+    """Returns the (class, piece, retriever name) of every target. Raises a DependencyPlanError for missing targets."""
+    if dependency_target is None:
+        return []
+    target_pieces = dependency_target.target_piece
+    target_names = dependency_target.piece_attr_name
+    if type(target_pieces) is not list:
+        target_pieces, target_names = [target_pieces], [target_names]
+
+    targets = []
+    for target_piece, target_name in zip(target_pieces, target_names):
+        if target_piece == "self":
+            target_class, target_piece = piece_class, piece
+        elif target_piece in _piece_classes:
+            target_class = _piece_classes[target_piece]
+        else:
+            raise DependencyPlanError(
+                f"Dependency of {piece_class.__name__}.{name} targets unknown piece '{target_piece}'")
+        if target_name not in target_class.get_schema().index:
+            raise DependencyPlanError(
+                f"Dependency of {piece_class.__name__}.{name} targets unknown retriever "
+                f"'{target_name}' in {target_class.__name__}")
+        targets.append((target_class, target_piece, target_name))
+    return targets
@@ -0,0 +1,144 @@
+from collections.abc import MutableSequence
+
+
+class LazyStructList(MutableSequence):
+    """ A list of fixed layout structs (See: `AoE2Struct.get_fixed_layout`) which is decoded in bulk.
+
+    The raw bytes of all structs are kept and structs are only materialized when they are accessed. Structs which were
+    never accessed are written back directly from the raw bytes. Any change in the structure of the list (inserting or
+    removing) materializes all structs, after which it behaves like a regular list.
+    """
+
+    def __init__(self, struct_class, layout, raw, offset=None):
+        """
+        Args:
+            struct_class (Type[AoE2Struct]): The struct class of the elements
+            layout (struct.Struct): The fixed layout of the struct class
+            raw (bytes): The raw bytes of all elements
+            offset (int): The position of the raw bytes in the data they were read from (if any)
+        """
+        self.struct_class = struct_class
+        self.layout = layout
+        # The piece (or struct) this list is the data of. Set as parent of materialized structs.
+        self.owner = None
+        self._raw = raw
+        self._offset = offset
+        self._items = [None] * (len(raw) // layout.size)
+        # Indexes of elements which were replaced, those are encoded again (even when the new struct is clean)
+        self._replaced = set()
+
+    @property
+    def is_raw(self):
+        """Returns True when no structural changes were made and unmaterialized elements are still read from bytes"""
+        return self._raw is not None
+
+    def iter_values(self):
+        """ Yields the value tuple of every element, in retriever order, without materializing structs. """
+        if self._raw is None:
+            for item in self._items:
+                yield tuple(item._values)
+            return
+        for item, values in zip(self._items, self.layout.iter_unpack(self._raw)):
+            if item is not None:
+                yield tuple(item._values)
+            else:
+                yield values
+
+    def to_bytes(self, pieces=None):
+        """ Returns the bytes of all elements. Only materialized structs are encoded again. """
+        buffer = bytearray()
+        self.write_bytes(buffer, pieces)
+        return bytes(buffer)
+
+    def write_bytes(self, sink, pieces=None):
+        """ Append the bytes of all elements to the sink (bytearray). Only materialized structs are encoded again. """
+        size = self.layout.size
+        start = len(sink)
+        if self._raw is None:
+            sink += bytes(size * len(self._items))
+        else:
+            sink += self._raw
+        for index, item in enumerate(self._items):
+            if item is not None and (item.is_dirty or self._raw is None or index in self._replaced):
+                self.layout.pack_into(sink, start + index * size, *self._get_struct_values(item, pieces))
+
+    def _get_struct_values(self, item, pieces):
+        values = item._values
+        if None in values:
+            defaults = self.struct_class.defaults(pieces)
+            values = [defaults[name] if v is None else v for name, v in zip(item.get_schema().names, values)]
+        return values
+
+    def _materialize(self, index):
+        item = self.struct_class()
+        size = self.layout.size
+        item.__dict__['_values'] = list(self.layout.unpack_from(self._raw, index * size))
+        if self._offset is not None:
+            item._set_source(self._offset + index * size, size)
+        item._set_clean(self._raw[index * size:(index + 1) * size])
+        if self.owner is not None:
+            self.owner._adopt(item)
+        self._items[index] = item
+        return item
+
+    def _materialize_all(self):
+        if self._raw is not None:
+            for index, item in enumerate(self._items):
+                if item is None:
+                    self._materialize(index)
+            self._raw = None
+            self._replaced.clear()
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self._items)))]
+        item = self._items[index]
+        if item is None:
+            item = self._materialize(index if index >= 0 else len(self._items) + index)
+        return item
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            self._materialize_all()
+        self._items[index] = value
+        if self._raw is not None:
+            self._replaced.add(index if index >= 0 else len(self._items) + index)
+        self._changed(value)
+
+    def __delitem__(self, index):
+        self._materialize_all()
+        del self._items[index]
+        self._changed()
+
+    def insert(self, index, value):
+        self._materialize_all()
+        self._items.insert(index, value)
+        self._changed(value)
+
+    def _changed(self, value=None):
+        if self.owner is not None:
+            self.owner._retriever_data_changed(value)
+
+    def __reduce__(self):
+        """The layout is taken from the struct class again when unpickled. The owner is set when the list is assigned."""
+        return _restore_lazy_struct_list, (
+            self.struct_class, self._raw, self._items, self._offset, self._replaced
+        )
+
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self):
+        for index in range(len(self._items)):
+            yield self[index]
+
+    def __repr__(self):
+        return f"[LazyStructList] {self.struct_class.__name__} * {len(self._items)}"
+
+
+def _restore_lazy_struct_list(struct_class, raw, items, offset, replaced=()):
+    struct_list = LazyStructList(struct_class, struct_class.get_fixed_layout(), b'', offset)
+    struct_list._raw = raw
+    struct_list._items = items
+    struct_list._replaced = set(replaced)
+    return struct_list
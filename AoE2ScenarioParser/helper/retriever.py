@@ -1,6 +1,7 @@
 from __future__ import annotations
 
-from typing import List, Union, TYPE_CHECKING
+from collections.abc import Sequence
+from typing import Dict, List, Union, TYPE_CHECKING
 
 from AoE2ScenarioParser.helper import helper
 from AoE2ScenarioParser.helper.datatype import DataType
@@ -8,6 +9,7 @@ from AoE2ScenarioParser.helper.retriever_dependency import RetrieverDependency
 
 if TYPE_CHECKING:
     from AoE2ScenarioParser.helper.retriever_object_link import RetrieverObjectLink
+    from AoE2ScenarioParser.pieces.aoe2_piece import AoE2Piece
 
 
 class Retriever:
@@ -16,7 +18,12 @@ class Retriever:
     on_refresh: RetrieverDependency
     """ A Class for defining how to retrieve data.
     The Constructor has quite some parameters which can all be used for getting the proper data
+
+    Retrievers are declared once per piece (or struct) class (See: `AoE2Piece.create_retrievers`) and shared between all
+    its instances. The data of an instance is accessed through a BoundRetriever (See: `AoE2Piece.retrievers`).
     """
+    __slots__ = ('name', 'datatype', 'possibly_list', 'log_value', 'on_construct', 'on_commit', 'on_refresh',
+                 'dependency_actions')
 
     def __init__(self, name, datatype=DataType(), possibly_list=True, log_value=False):
         """
@@ -33,20 +40,72 @@ class Retriever:
         self.datatype._debug_retriever_name = name
         self.possibly_list = possibly_list
         self.log_value = log_value
-        self._data = None
+        # The actions of all dependencies of this retriever, None when it has none (Set by: PieceSchema)
+        self.dependency_actions = None
+
+    def to_simple_string(self):
+        return f"[Retriever] {self.name}: {self.datatype}"
+
+    def __repr__(self):
+        return self.to_simple_string()
+
+
+class BoundRetriever:
+    """ A retriever of a piece (or struct) instance.
+
+    A light view which is created when it's requested. The data and the repeat (the datatype) are stored in the piece,
+    everything else is read from the (shared) Retriever of the class.
+    """
+    __slots__ = ('retriever', 'piece', 'position')
+
+    def __init__(self, retriever: Retriever, piece: AoE2Piece, position: int):
+        self.retriever = retriever
+        self.piece = piece
+        self.position = position
+
+    @property
+    def name(self) -> str:
+        return self.retriever.name
+
+    @property
+    def datatype(self) -> DataType:
+        return self.piece._get_datatype(self.position)
+
+    @property
+    def possibly_list(self) -> bool:
+        return self.retriever.possibly_list
+
+    @property
+    def log_value(self) -> bool:
+        return self.retriever.log_value
+
+    @property
+    def dependency_actions(self):
+        return self.retriever.dependency_actions
+
+    @property
+    def on_construct(self) -> RetrieverDependency:
+        return self.retriever.on_construct
+
+    @property
+    def on_commit(self) -> RetrieverDependency:
+        return self.retriever.on_commit
+
+    @property
+    def on_refresh(self) -> RetrieverDependency:
+        return self.retriever.on_refresh
 
     @property
     def data(self):
-        return self._data
+        return self.piece._values[self.position]
 
     @data.setter
     def data(self, value):
-        old_value = ""
-        if hasattr(self, 'data'):
-            old_value = self.data
-        self._data = value
-        if self.log_value:
-            self._update_print(old_value, value)
+        self.piece._set_value(self.position, value)
+
+    def set_repeat(self, value):
+        """Set the repeat of the datatype (for this instance only)"""
+        self.piece._set_repeat(self.position, value)
 
     def _update_print(self, old, new):
         print(f"{self.to_simple_string()} >>> set to: {helper.q_str(new)} (was: {helper.q_str(old)})")
@@ -70,8 +129,46 @@ class Retriever:
         return f"{self.to_simple_string()} >>> {data}"
 
 
-def get_retriever_by_name(retriever_list: List[Union[Retriever, RetrieverObjectLink]], name: str) \
-        -> Union[Retriever, RetrieverObjectLink]:
+class RetrieverList(Sequence):
+    """ The retrievers of a piece (or struct) instance, with an index of their names (name -> position).
+
+    The BoundRetrievers are created when they're requested, so only the data of the piece is stored per instance. The
+    index is shared between all instances of a class (See: `PieceSchema`).
+    """
+    __slots__ = ('piece', 'index')
+
+    def __init__(self, piece: AoE2Piece, index: Dict[str, int]):
+        self.piece = piece
+        self.index = index
+
+    def __getitem__(self, position):
+        retrievers = self.piece._schema.retrievers
+        if isinstance(position, slice):
+            return [BoundRetriever(retrievers[i], self.piece, i) for i in range(*position.indices(len(retrievers)))]
+        if position < 0:
+            position += len(retrievers)
+        return BoundRetriever(retrievers[position], self.piece, position)
+
+    def __len__(self):
+        return len(self.piece._values)
+
+    def __iter__(self):
+        piece = self.piece
+        for position, retriever in enumerate(piece._schema.retrievers):
+            yield BoundRetriever(retriever, piece, position)
+
+    def __repr__(self):
+        return repr(list(self))
+
+
+def get_retriever_by_name(retriever_list: List[Union[BoundRetriever, RetrieverObjectLink]], name: str) \
+        -> Union[BoundRetriever, RetrieverObjectLink]:
+    if type(retriever_list) is RetrieverList:
+        position = retriever_list.index.get(name)
+        if position is None:
+            return None
+        piece = retriever_list.piece
+        return BoundRetriever(piece._schema.retrievers[position], piece, position)
     for retriever in retriever_list:
         if retriever.name == name:
             return retriever
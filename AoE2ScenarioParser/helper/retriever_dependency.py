@@ -52,10 +52,14 @@ class DependencyEval:
     def __init__(self, eval_code, eval_locals=None, values_as_variable=None):
         """
         Object for storing dependency eval code and it's locals.
+        The code is compiled once into a function (See: `evaluate`), which is shared between all DependencyEvals with
+        the same code, locals and variables.
 
         Args:
             eval_code (str): The code executed using eval
             eval_locals (dict): The locals dict handed to the eval function
+            values_as_variable (List[str]): The variable names of the target values. When empty, the (first) value is
+                available as 'x'
         """
         if eval_locals is None:
             eval_locals = {}
@@ -64,6 +68,23 @@ class DependencyEval:
         self.eval_code = eval_code
         self.eval_locals = eval_locals
         self.values_as_variable = values_as_variable
+        self.function = _compile_eval(eval_code, tuple(values_as_variable) or ('x',), eval_locals)
+
+    def evaluate(self, values):
+        """Evaluate the code with the given target values"""
+        if self.values_as_variable:
+            return self.function(*values)
+        return self.function(values[0])
+
+
+_compiled_evals = {}
+
+
+def _compile_eval(eval_code, variables, eval_locals):
+    key = (eval_code, variables, tuple(sorted(eval_locals.items(), key=lambda item: item[0])))
+    if key not in _compiled_evals:
+        _compiled_evals[key] = eval(f"lambda {', '.join(variables)}: {eval_code}", dict(eval_locals))
+    return _compiled_evals[key]
 
 
 class DependencyAction(Enum):
@@ -1,7 +1,7 @@
-from typing import Type, List
+from typing import Type, Optional, Tuple
 
 from AoE2ScenarioParser.helper.parser import handle_retriever_dependency
-from AoE2ScenarioParser.helper.retriever import get_retriever_by_name
+from AoE2ScenarioParser.helper.retriever import BoundRetriever
 from AoE2ScenarioParser.objects.aoe2_object import AoE2Object
 
 
@@ -20,6 +20,7 @@ class RetrieverObjectLink:
         self.name: str = variable_name
         self.piece = piece
         self.link = link
+        self.steps: Tuple[Tuple[str, Optional[int], bool], ...] = _compile_link(link) if link is not None else ()
         self.is_special_unit_case = self._self_is_special_unit_case()
         self.process_as_object: Type[AoE2Object] = process_as_object
         self.retrieve_instance_number: bool = retrieve_instance_number
@@ -38,21 +39,12 @@ class RetrieverObjectLink:
         else:
             if self.is_special_unit_case:
                 return self._construct_special_unit_case(pieces)
-            # Use temp_link to not change the actual links as they are class attributes
-            temp_link = self.link
-            if instance_number_history:
-                for i in instance_number_history:
-                    temp_link = temp_link.replace("__index__", str(i), 1)
-            temp_link = temp_link.replace("__index__", str(instance_number), 1)
-
+            indexes = instance_number_history + [instance_number]
             value = pieces[self.piece]
-            for x in temp_link.split("."):
-                if "[" in x:
-                    indexing = x.index('[')
-                    value = getattr(value, x[:indexing])
-                    value = value[int(x[indexing + 1:len(x) - 1])]
-                else:
-                    value = getattr(value, x)
+            for name, index, is_slot in self.steps:
+                value = value.get_value(name)
+                if index is not None:
+                    value = value[indexes[index] if is_slot else index]
 
             if self.process_as_object is not None:
                 value_list = []
@@ -64,6 +56,9 @@ class RetrieverObjectLink:
                         )
                     )
                 return value_list
+            if type(value) is list:
+                # Lists are copied (here and on commit) so in place changes on the object are detected on commit
+                return list(value)
             return value
 
     def commit(self, pieces, host_obj):
@@ -76,33 +71,20 @@ class RetrieverObjectLink:
         instance_number = AoE2Object.get_instance_number(obj=host_obj)
         value = host_obj.__getattribute__(self.name)
 
-        # Replace __index__ values
-        temp_link = self.link
-        if instance_number_history:
-            for i in instance_number_history:
-                temp_link = temp_link.replace("__index__", str(i), 1)
-        temp_link = temp_link.replace("__index__", str(instance_number), 1)
-
-        if self.is_special_unit_case:
-            temp_link = temp_link.replace('[]', '[0]', 1)
-
-        split_temp_link: List[str] = temp_link.split(".")
-        retriever = None
+        indexes = instance_number_history + [instance_number]
+        position = None
 
         piece = pieces[self.piece]
-        for attribute in split_temp_link:
-            if '[' in attribute:
-                index_location = attribute.index('[')
-                index = int(attribute[index_location + 1:len(attribute) - 1])
-                piece = get_retriever_by_name(piece.retrievers, attribute[:index_location]).data[index]
+        for name, index, is_slot in self.steps:
+            if index is not None:
+                piece = piece.get_value(name)[indexes[index] if is_slot else index]
             else:
-                retriever = get_retriever_by_name(piece.retrievers, attribute)
+                position = piece._schema.index.get(name)
 
-        if retriever is None:
+        if position is None:
             raise ValueError("RetrieverObjectLink is unable to connect to retriever")
 
-        retriever_list = piece.retrievers
-
+        retriever = BoundRetriever(piece._schema.retrievers[position], piece, position)
         if self.process_as_object is not None:
             link_piece = retriever.datatype.var
 
@@ -133,10 +115,10 @@ class RetrieverObjectLink:
                 obj._instance_number_history = host_obj._instance_number_history + [index]
                 obj.commit()
         else:
-            retriever.data = value
+            retriever.data = list(value) if type(value) is list else value
 
-        if hasattr(retriever, 'on_commit'):
-            handle_retriever_dependency(retriever, retriever_list, "commit", pieces)
+        if hasattr(retriever.retriever, 'on_commit'):
+            handle_retriever_dependency(retriever, piece.retrievers, "commit", pieces)
 
     def _self_is_special_unit_case(self):
         if self.link is not None:
@@ -144,12 +126,12 @@ class RetrieverObjectLink:
         return False
 
     def _construct_special_unit_case(self, pieces):
-        list_notation_location = self.link.find("[]")
-        struct_list = getattr(pieces[self.piece], self.link[:list_notation_location])
+        (list_name, _, _), (attribute_name, _, _) = self.steps
+        struct_list = getattr(pieces[self.piece], list_name)
         list_len = len(struct_list)
         result_list = [[] for _ in range(list_len)]
         for i in range(list_len):
-            list_of_attributes = struct_list[i].__getattr__(self.link[list_notation_location + 3:])
+            list_of_attributes = struct_list[i].__getattr__(attribute_name)
             for j in range(len(list_of_attributes)):
                 result_list[i].append(self.process_as_object._construct(pieces, [i, j]))
         return result_list
@@ -170,3 +152,26 @@ class RetrieverObjectLink:
                (f"\n\t- Process as: {self.process_as_object.__name__}" if self.process_as_object else "") + \
                (f"\n\t- Get Instance Number: True" if self.retrieve_instance_number else "") + \
                (f"\n\t- Get Hist Number: {self.retrieve_history_number}" if self.retrieve_history_number >= 0 else "")
+
+
+def _compile_link(link: str) -> Tuple[Tuple[str, Optional[int], bool], ...]:
+    """
+    Compile a link (like: "trigger_data[__index__].effect_data[__index__].effect_type") into a tuple of steps. Every
+    step is a tuple of: (attribute name, index, is_slot). When is_slot is True, the index is the position of the
+    '__index__' in the link, which is filled using the instance number history. Otherwise the index is a fixed index or
+    None when the attribute isn't indexed. The '[]' of the special unit case is compiled as the fixed index 0.
+    """
+    steps = []
+    slot = 0
+    for attribute in link.split("."):
+        if "[" not in attribute:
+            steps.append((attribute, None, False))
+            continue
+        index_location = attribute.index("[")
+        index_string = attribute[index_location + 1:-1]
+        if index_string == "__index__":
+            steps.append((attribute[:index_location], slot, True))
+            slot += 1
+        else:
+            steps.append((attribute[:index_location], int(index_string) if index_string else 0, False))
+    return tuple(steps)
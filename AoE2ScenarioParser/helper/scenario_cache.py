@@ -0,0 +1,137 @@
+import copyreg
+import hashlib
+import io
+import os
+import pickle
+import tempfile
+import time
+
+from AoE2ScenarioParser import __version__
+from AoE2ScenarioParser.pieces.aoe2_piece import AoE2Piece
+
+# Changes when the layout of the snapshots changes. Part of the key, together with the library version.
+snapshot_format = 2
+extension = ".aoe2cache"
+
+
+class ScenarioCache:
+    """ A directory with snapshots of parsed scenarios (See: `AoE2Scenario.from_file(..., cache_dir=...)`).
+
+    A snapshot holds the header, the decompressed body and the parsed pieces (which reuse the bytes of the header and
+    body). Loading a snapshot skips decompressing and parsing the file. Snapshots are stored by the hash of the file
+    content, the library version and the snapshot format. So changed files or a different version of the library never
+    use an old snapshot.
+
+    Snapshots are written to a temporary file first which is moved in place, so multiple processes can share a cache
+    directory. After storing a snapshot, snapshots older than `max_age` are removed. After that the least recently used
+    snapshots are removed until the directory is smaller than `max_size`.
+
+    Please note that snapshots are pickles, only use cache directories which can't be written to by others.
+    """
+
+    def __init__(self, directory, max_size=2 ** 30, max_age=30 * 24 * 60 * 60):
+        """
+        Args:
+            directory (Union[str, os.PathLike]): The directory to store the snapshots in. It's created when it doesn't
+                exist.
+            max_size (int): The maximum total size of all snapshots in bytes (None for no limit)
+            max_age (float): The maximum age of a snapshot in seconds since it was last used (None for no limit)
+        """
+        self.directory = directory
+        self.max_size = max_size
+        self.max_age = max_age
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def get_key(file_data) -> str:
+        """Returns the key of the snapshot for the given (raw) file content"""
+        content_hash = hashlib.sha256(file_data).hexdigest()
+        return f"{content_hash}-{__version__}-{snapshot_format}"
+
+    def load(self, key):
+        """Returns the (header, body, parsed_header, parsed_data) of the snapshot or None when it doesn't exist."""
+        path = self._get_path(key)
+        try:
+            with open(path, "rb") as file:
+                snapshot = pickle.load(file)
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # Broken snapshot (like a snapshot removed while it was read), it's parsed and stored again
+            return None
+        return snapshot
+
+    def store(self, key, header, body, parsed_header, parsed_data):
+        """Store a snapshot of the parsed pieces and evict old snapshots"""
+        file_descriptor, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(file_descriptor, "wb") as file:
+                file.write(dumps_snapshot((header, body, parsed_header, parsed_data)))
+            os.replace(temp_path, self._get_path(key))
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        self.evict()
+
+    def evict(self):
+        """Remove snapshots older than max_age, then the least recently used until the total size is below max_size."""
+        entries = []
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith(extension):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        now = time.time()
+        total_size = sum(size for _, size, _ in entries)
+        for last_used, size, path in sorted(entries):
+            too_old = self.max_age is not None and now - last_used > self.max_age
+            too_large = self.max_size is not None and total_size > self.max_size
+            if not too_old and not too_large:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total_size -= size
+
+    def clear(self):
+        """Remove all snapshots"""
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(extension):
+                try:
+                    os.remove(entry.path)
+                except FileNotFoundError:
+                    pass
+
+    def _get_path(self, key):
+        return os.path.join(self.directory, key + extension)
+
+    def __repr__(self):
+        return f"ScenarioCache[directory: {self.directory}, max_size: {self.max_size}, max_age: {self.max_age}]"
+
+
+def dumps_snapshot(obj) -> bytes:
+    """Pickle obj. Pieces are pickled including their source, so they're clean when loaded (See: `AoE2Piece._reduce`)"""
+    buffer = io.BytesIO()
+    pickler = pickle.Pickler(buffer, protocol=pickle.HIGHEST_PROTOCOL)
+    pickler.dispatch_table = copyreg.dispatch_table.copy()
+    for piece_class in _get_piece_classes(AoE2Piece):
+        pickler.dispatch_table[piece_class] = _reduce_with_source
+    pickler.dump(obj)
+    return buffer.getvalue()
+
+
+def _reduce_with_source(piece):
+    return piece._reduce(keep_source=True)
+
+
+def _get_piece_classes(piece_class):
+    for subclass in piece_class.__subclasses__():
+        yield subclass
+        yield from _get_piece_classes(subclass)
@@ -31,6 +31,15 @@ class AoE2Object:
             setattr(result, k, val)
         return result
 
+    def __getstate__(self):
+        """
+        The pieces are not pickled with the object. (Scenarios don't pickle the objects of their managers, See:
+        `AoE2Scenario.__reduce__`)
+        """
+        state = self.__dict__.copy()
+        state['_pieces'] = OrderedDict()
+        return state
+
     @classmethod
     def _construct(cls, pieces: OrderedDictType[str, AoE2Piece], instance_number_history=None):
         if instance_number_history is None:
@@ -22,8 +22,7 @@ class AoE2ObjectManager:
         # Todo: Create a piece holder object or something to simplify this process
         self.pieces: OrderedDict[str, AoE2Piece] = OrderedDict(**parsed_header, **parsed_data)
 
-        lgr = SimpleLogger(log_parsing)
-        lgr.print("\nParsing pieces and structs to objects...")
+        self.log_parsing = log_parsing
         self.parsed_header = parsed_header
         self.parsed_data = parsed_data
 
@@ -32,16 +31,9 @@ class AoE2ObjectManager:
             TriggersObject,
             UnitsObject,
         ]
+        # Objects are constructed on first access using get_object(). Only constructed objects are in this dict.
         self.objects = {}
 
-        for obj in self.constructables:
-            lgr.print("\tParsing " + obj.__name__ + "...", replace_line=True)
-            self.objects[obj.__name__] = obj._construct(self.pieces)
-            lgr.print("\tParsing " + obj.__name__ + " finished successfully.", replace_line=True)
-            lgr.print()
-
-        lgr.print("Parsing pieces and structs to objects finished successfully.")
-
         # self._objects = {
         #     # "FileHeaderObject": self._parse_file_header_object(),
         #     # "DataHeaderObject": self._parse_data_header_object(),
@@ -54,13 +46,35 @@ class AoE2ObjectManager:
         #     "TriggersObject": TriggersObject.parse_object(self.parsed_data)
         # }
 
-    def reconstruct(self, log_reconstructing=False):
+    def get_object(self, name):
+        """Returns the object with the given class name. The object is constructed from the pieces on first access."""
+        if name not in self.objects:
+            obj = next(obj for obj in self.constructables if obj.__name__ == name)
+
+            lgr = SimpleLogger(self.log_parsing)
+            lgr.print("\nParsing pieces and structs to " + name + "...")
+            self.objects[name] = obj._construct(self.pieces)
+            lgr.print("Parsing pieces and structs to " + name + " finished successfully.")
+        return self.objects[name]
+
+    def reconstruct(self, log_reconstructing=False, pieces=None):
+        """
+        Commits all objects which have been constructed. Pieces of other objects are not touched.
+
+        Args:
+            log_reconstructing (bool): Log the progress
+            pieces (OrderedDict[str, AoE2Piece]): The pieces to commit to. Defaults to the pieces of this manager.
+        """
+        if pieces is None:
+            pieces = self.pieces
         lgr = SimpleLogger(log_reconstructing)
         lgr.print("\nReconstructing pieces and structs from objects...")
 
         for obj in self.constructables:
+            if obj.__name__ not in self.objects:
+                continue
             lgr.print("\tReconstructing " + obj.__name__ + "...", replace_line=True)
-            self.objects[obj.__name__].commit(pieces=self.pieces)
+            self.objects[obj.__name__].commit(pieces=pieces)
             lgr.print("\tReconstructing " + obj.__name__ + " finished successfully.", replace_line=True)
             lgr.print()
 
@@ -1,11 +1,12 @@
 from __future__ import annotations
 
-from typing import List
+from typing import List, Optional
 
 from AoE2ScenarioParser.datasets.terrains import Terrain
 from AoE2ScenarioParser.helper import helper
 from AoE2ScenarioParser.helper.retriever_object_link import RetrieverObjectLink
 from AoE2ScenarioParser.objects.aoe2_object import AoE2Object
+from AoE2ScenarioParser.objects.terrain_grid import TerrainGrid
 from AoE2ScenarioParser.objects.terrain_obj import TerrainObject
 
 
@@ -18,9 +19,10 @@ class MapObject(AoE2Object):
         RetrieverObjectLink("villager_force_drop", "MapPiece", "villager_force_drop"),
         RetrieverObjectLink("map_width", "MapPiece", "map_width"),
         RetrieverObjectLink("map_height", "MapPiece", "map_height"),
-        RetrieverObjectLink("terrain", "MapPiece", "terrain_data", process_as_object=TerrainObject),
         RetrieverObjectLink("script_name", "MapPiece", "script_name"),
     ]
+    # Terrain is constructed on first access. Either as list of TerrainObjects (terrain) or as grid (terrain_grid)
+    _terrain_link = RetrieverObjectLink("terrain", "MapPiece", "terrain_data", process_as_object=TerrainObject)
 
     def __init__(self,
                  map_color_mood: str,
@@ -28,7 +30,7 @@ class MapObject(AoE2Object):
                  villager_force_drop: bool,
                  map_width: int,
                  map_height: int,
-                 terrain: List[TerrainObject],
+                 terrain: Optional[List[TerrainObject]],
                  script_name: str
                  ):
         if map_width != map_height:
@@ -39,10 +41,63 @@ class MapObject(AoE2Object):
         self.villager_force_drop = villager_force_drop
         self._map_width = map_width
         self._map_height = map_height
-        self.terrain = terrain
+        self._terrain: Optional[List[TerrainObject]] = terrain
+        self._terrain_grid: Optional[TerrainGrid] = None
         self.script_name = script_name
         super().__init__()
 
+    @classmethod
+    def _construct(cls, pieces, instance_number_history=None):
+        object_parameters = {link.name: link.construct(pieces, instance_number_history) for link in cls._link_list}
+        # The terrain is constructed on first access (See: `terrain` and `terrain_grid`)
+        obj = cls(terrain=None, **object_parameters)
+        obj._pieces = pieces
+        return obj
+
+    @property
+    def terrain(self) -> List[TerrainObject]:
+        """
+        All tiles in the map as TerrainObjects. Please note that the terrain list and the `terrain_grid` cannot be used
+        at the same time. Accessing one converts the other into it. References to the other are no longer committed.
+        """
+        if self._terrain is None:
+            if self._terrain_grid is not None:
+                self._terrain = self._terrain_grid.to_terrain_objects()
+                self._terrain_grid = None
+            else:
+                self._terrain = self._terrain_link.construct(self._pieces)
+        return self._terrain
+
+    @terrain.setter
+    def terrain(self, value: List[TerrainObject]):
+        self._terrain = value
+        self._terrain_grid = None
+
+    @property
+    def terrain_grid(self) -> TerrainGrid:
+        """
+        All tiles in the map as a TerrainGrid. Use this for (vectorized) operations on many tiles at once. Please note
+        that the terrain list and the `terrain_grid` cannot be used at the same time. Accessing one converts the other
+        into it. References to the other are no longer committed.
+        """
+        if self._terrain_grid is None:
+            if self._terrain is not None:
+                self._terrain_grid = TerrainGrid.from_terrain_objects(self._terrain, self.map_size)
+                self._terrain = None
+            else:
+                self._terrain_grid = TerrainGrid.from_terrain_data(
+                    self._pieces['MapPiece'].terrain_data, self.map_size
+                )
+        return self._terrain_grid
+
+    def commit(self, pieces=None, local_link_list=None):
+        if local_link_list is None:
+            if self._terrain_grid is not None:
+                self._terrain_grid.commit(pieces if pieces is not None else self._pieces)
+            elif self._terrain is not None:
+                self._terrain_link.commit(pieces if pieces is not None else self._pieces, host_obj=self)
+        super().commit(pieces, local_link_list)
+
     @property
     def map_width(self) -> int:
         return self._map_width
@@ -60,6 +115,12 @@ class MapObject(AoE2Object):
 
     @map_size.setter
     def map_size(self, size: int):
+        if self._terrain_grid is not None:
+            self._terrain_grid.resize(size)
+            self._map_width = size
+            self._map_height = size
+            return
+
         new_length = size * size
         difference = new_length - len(self.terrain)
 
@@ -95,6 +156,10 @@ class MapObject(AoE2Object):
         :Author:
             pvallet
         """
+        if self._terrain is None:
+            self.terrain_grid.stamp_elevation(x1, y1, x2, y2, elevation)
+            return
+
         for x in range(max(0, x1 - elevation), min(self.map_size, x2 + elevation)):
             for y in range(max(0, y1 - elevation), min(self.map_size, y2 + elevation)):
                 if x1 <= x <= x2 and y1 <= y <= y2:
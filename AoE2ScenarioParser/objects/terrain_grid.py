@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+import sys
+from array import array
+from typing import List, TYPE_CHECKING
+
+from AoE2ScenarioParser.datasets.terrains import Terrain
+from AoE2ScenarioParser.helper import helper
+from AoE2ScenarioParser.helper.lazy_struct_list import LazyStructList
+from AoE2ScenarioParser.helper.parser import handle_retriever_dependency
+from AoE2ScenarioParser.helper.retriever import get_retriever_by_name
+from AoE2ScenarioParser.objects.terrain_obj import TerrainObject
+from AoE2ScenarioParser.pieces.structs.terrain import TerrainStruct
+
+if TYPE_CHECKING:
+    from typing import OrderedDict as OrderedDictType
+    from AoE2ScenarioParser.pieces.aoe2_piece import AoE2Piece
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# (name, array typecode, numpy dtype) of the editable TerrainStruct columns
+_columns = [
+    ("terrain_id", "B", "u1"),
+    ("elevation", "B", "u1"),
+    ("layer", "h", "<i2"),
+]
+
+
+class TerrainGrid:
+    """ Columnar representation of all tiles in the map.
+
+    The terrain_id, elevation and layer of all tiles are stored in three arrays. When numpy is installed these are
+    2-D numpy arrays with the shape (map_size, map_size), indexed as [x, y]. Otherwise these are flat `array.array`
+    objects indexed with `helper.xy_to_i(x, y, map_size)`.
+    All other bytes of the tiles are kept as is and written back unchanged.
+    """
+
+    def __init__(self, map_size: int, raw: bytes):
+        """
+        Args:
+            map_size (int): The width (and height) of the map
+            raw (bytes): The bytes of all TerrainStructs in the map
+        """
+        self.map_size = map_size
+        self._layout = TerrainStruct.get_fixed_layout()
+        self._offsets = _get_column_offsets()
+        self._raw = raw
+        # The terrain_data (of the MapPiece) which holds the same bytes as _raw, used to skip unchanged commits
+        self._committed_data = None
+        if len(raw) != map_size * map_size * self._layout.size:
+            raise ValueError(f"Terrain data does not match the map size of {map_size}x{map_size}")
+
+        for name, typecode, dtype in _columns:
+            setattr(self, name, self._read_column(name, typecode, dtype))
+
+    @classmethod
+    def from_terrain_data(cls, terrain_data, map_size: int) -> TerrainGrid:
+        """Create a grid from the `terrain_data` of the MapPiece (A list of TerrainStructs)"""
+        if type(terrain_data) is LazyStructList:
+            grid = cls(map_size, terrain_data.to_bytes())
+        else:
+            layout = TerrainStruct.get_fixed_layout()
+            defaults = list(TerrainStruct.defaults(None).values())
+            grid = cls(map_size, b''.join(
+                layout.pack(*[r.data if r.data is not None else d for r, d in zip(struct.retrievers, defaults)])
+                for struct in terrain_data
+            ))
+        grid._committed_data = terrain_data
+        return grid
+
+    @classmethod
+    def from_terrain_objects(cls, terrain: List[TerrainObject], map_size: int) -> TerrainGrid:
+        grid = cls(map_size, _default_tiles(map_size * map_size))
+        grid._set_flat("terrain_id", [tile.terrain_id for tile in terrain])
+        grid._set_flat("elevation", [tile.elevation for tile in terrain])
+        grid._set_flat("layer", [tile.layer for tile in terrain])
+        return grid
+
+    def to_terrain_objects(self) -> List[TerrainObject]:
+        return [
+            TerrainObject(terrain_id, elevation, layer) for terrain_id, elevation, layer in
+            zip(self._get_flat("terrain_id"), self._get_flat("elevation"), self._get_flat("layer"))
+        ]
+
+    def to_bytes(self) -> bytes:
+        """Returns the bytes of all TerrainStructs in the grid"""
+        buffer = bytearray(self._raw)
+        size = self._layout.size
+        for name, typecode, dtype in _columns:
+            offset, length = self._offsets[name]
+            column_bytes = self._column_to_bytes(name, typecode)
+            for i in range(length):
+                buffer[offset + i::size] = column_bytes[i::length]
+        return bytes(buffer)
+
+    def commit(self, pieces: OrderedDictType[str, AoE2Piece]) -> None:
+        """
+        Write the grid back to the `terrain_data` of the MapPiece in bulk. Nothing is written when the grid wasn't
+        changed since it was read from (or last committed to) that terrain_data, so the MapPiece stays clean.
+        """
+        raw = self.to_bytes()
+        piece = pieces['MapPiece']
+        retriever = get_retriever_by_name(piece.retrievers, "terrain_data")
+        if retriever.data is self._committed_data and raw == self._raw:
+            return
+        self._raw = raw
+        retriever.data = LazyStructList(TerrainStruct, self._layout, self._raw)
+        handle_retriever_dependency(retriever, piece.retrievers, "commit", pieces)
+        self._committed_data = retriever.data
+
+    def resize(self, map_size: int) -> None:
+        """
+        Resize the grid the same way `MapObject.map_size` does with the terrain list. Tiles are removed from or
+        appended to the end (in `xy_to_i` order). New tiles are GRASS_1 with an elevation of 1.
+        """
+        self._raw = self.to_bytes()
+        new_length = map_size * map_size * self._layout.size
+        if new_length < len(self._raw):
+            self._raw = self._raw[:new_length]
+        else:
+            self._raw += _default_tiles((new_length - len(self._raw)) // self._layout.size)
+        self.__init__(map_size, self._raw)
+
+    def fill(self, x1: int, y1: int, x2: int, y2: int, terrain_id: int = None, elevation: int = None,
+             layer: int = None) -> None:
+        """
+        Set the terrain_id, elevation and/or layer of all tiles in the area from (x1, y1) to (x2, y2) (inclusive).
+        Arguments which are left None are not changed.
+        """
+        x1, y1 = max(0, x1), max(0, y1)
+        x2, y2 = min(self.map_size - 1, x2), min(self.map_size - 1, y2)
+        for name, value in [("terrain_id", terrain_id), ("elevation", elevation), ("layer", layer)]:
+            if value is None:
+                continue
+            column = getattr(self, name)
+            if numpy is not None:
+                column[x1:x2 + 1, y1:y2 + 1] = value
+            else:
+                for x in range(x1, x2 + 1):
+                    start = helper.xy_to_i(x, y1, self.map_size)
+                    column[start:start + y2 - y1 + 1] = array(column.typecode, [value] * (y2 - y1 + 1))
+
+    def replace_terrain(self, from_terrain_id: int, to_terrain_id: int, mask=None) -> None:
+        """
+        Replace all tiles with the from_terrain_id with to_terrain_id.
+
+        Args:
+            from_terrain_id (int): The terrain to replace
+            to_terrain_id (int): The terrain to replace it with
+            mask: An (optional) boolean mask to limit the replacement to. When numpy is installed this can be anything
+                numpy can convert to a (map_size, map_size) boolean array. Otherwise a flat sequence of booleans in
+                `xy_to_i` order.
+        """
+        if numpy is not None:
+            selection = self.terrain_id == from_terrain_id
+            if mask is not None:
+                selection &= numpy.asarray(mask, dtype=bool).reshape(self.terrain_id.shape)
+            self.terrain_id[selection] = to_terrain_id
+        else:
+            for i, terrain_id in enumerate(self.terrain_id):
+                if terrain_id == from_terrain_id and (mask is None or mask[i]):
+                    self.terrain_id[i] = to_terrain_id
+
+    def stamp_elevation(self, x1: int, y1: int, x2: int, y2: int, elevation: int) -> None:
+        """
+        Raise the area from (x1, y1) to (x2, y2) to the given elevation with smooth slopes around it. Tiles are never
+        lowered. This is the grid equivalent of `MapObject.create_hill`.
+        """
+        x_start, x_end = max(0, x1 - elevation), min(self.map_size, x2 + elevation)
+        y_start, y_end = max(0, y1 - elevation), min(self.map_size, y2 + elevation)
+        if x_start >= x_end or y_start >= y_end:
+            return
+
+        if numpy is not None:
+            xs = numpy.arange(x_start, x_end)[:, None]
+            ys = numpy.arange(y_start, y_end)[None, :]
+            distance = numpy.maximum(
+                numpy.maximum(numpy.maximum(x1 - xs, xs - x2), 0),
+                numpy.maximum(numpy.maximum(y1 - ys, ys - y2), 0)
+            )
+            region = self.elevation[x_start:x_end, y_start:y_end]
+            numpy.maximum(region, elevation - distance, out=region, casting='unsafe')
+        else:
+            for x in range(x_start, x_end):
+                distance_x = max(x1 - x, x - x2, 0)
+                for y in range(y_start, y_end):
+                    i = helper.xy_to_i(x, y, self.map_size)
+                    intended_elevation = elevation - max(distance_x, y1 - y, y - y2)
+                    if intended_elevation > self.elevation[i]:
+                        self.elevation[i] = intended_elevation
+
+    def _read_column(self, name, typecode, dtype):
+        offset, length = self._offsets[name]
+        size = self._layout.size
+        column_bytes = bytearray(len(self._raw) // size * length)
+        for i in range(length):
+            column_bytes[i::length] = self._raw[offset + i::size]
+        if numpy is not None:
+            return numpy.frombuffer(column_bytes, dtype=dtype).reshape((self.map_size, self.map_size))
+        column = array(typecode, bytes(column_bytes))
+        if sys.byteorder == "big":
+            column.byteswap()
+        return column
+
+    def _column_to_bytes(self, name, typecode):
+        column = getattr(self, name)
+        if numpy is not None:
+            return column.astype(dict((n, d) for n, t, d in _columns)[name], copy=False).tobytes()
+        column = array(typecode, column)
+        if sys.byteorder == "big":
+            column.byteswap()
+        return column.tobytes()
+
+    def _get_flat(self, name):
+        column = getattr(self, name)
+        return column.ravel().tolist() if numpy is not None else column.tolist()
+
+    def _set_flat(self, name, values):
+        column = getattr(self, name)
+        if numpy is not None:
+            column.ravel()[:] = values
+        else:
+            column[:] = array(column.typecode, values)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_layout']
+        state['_committed_data'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._layout = TerrainStruct.get_fixed_layout()
+
+    def __repr__(self):
+        return f"TerrainGrid[map_size: {self.map_size}, numpy: {numpy is not None}]"
+
+
+def _get_column_offsets():
+    """Returns a dict with the (offset, length) of every retriever in the TerrainStruct layout"""
+    offsets = {}
+    offset = 0
+    for retriever in TerrainStruct().retrievers:
+        length = retriever.datatype.codec.var_len
+        offsets[retriever.name] = (offset, length)
+        offset += length
+    return offsets
+
+
+def _default_tiles(amount):
+    defaults = TerrainStruct.defaults(None)
+    defaults['terrain_id'] = Terrain.GRASS_1
+    defaults['elevation'] = 1
+    return TerrainStruct.get_fixed_layout().pack(*defaults.values()) * amount
@@ -2,60 +2,200 @@ import abc
 
 from AoE2ScenarioParser.helper import helper
 from AoE2ScenarioParser.helper import parser
-from AoE2ScenarioParser.helper.retriever import get_retriever_by_name
+from AoE2ScenarioParser.helper.dependency_plan import register_piece_class
+from AoE2ScenarioParser.helper.lazy_struct_list import LazyStructList
+from AoE2ScenarioParser.helper.retriever import RetrieverList
+
+# Values of these types can't be changed in place, setting them to themselves doesn't change a piece
+_immutable_types = (int, float, str, bytes, bool, tuple, type(None))
+
+
+class PieceSchema:
+    """ The layout of a piece (or struct) class which is shared between all its instances.
+
+    Holds the retrievers (See: `AoE2Piece.create_retrievers`), their names, an index of those names (name -> position)
+    and their datatypes. The dependencies (from the `dependencies` class attribute) are set on the retrievers once, when
+    the schema is created. Instances only store the data of their retrievers and the datatypes of which the repeat is
+    different (See: `AoE2Piece._set_repeat`).
+    """
+    __slots__ = ('retrievers', 'names', 'index', 'datatypes')
+
+    def __init__(self, retrievers, dependencies):
+        self.retrievers = tuple(retrievers)
+        self.names = tuple(retriever.name for retriever in retrievers)
+        self.index = {}
+        for position, name in enumerate(self.names):
+            self.index.setdefault(name, position)
+
+        for retriever in retrievers:
+            retriever_dependencies = dependencies.get(retriever.name, {})
+            for key, value in retriever_dependencies.items():
+                setattr(retriever, key, value)
+            if retriever_dependencies:
+                retriever.dependency_actions = tuple(
+                    dependency.dependency_type
+                    for value in retriever_dependencies.values() for dependency in parser.listify(value)
+                    if dependency is not None
+                )
+            retriever.datatype.shared = True
+        self.datatypes = tuple(retriever.datatype for retriever in retrievers)
 
 
 class AoE2Piece:
+    """
+    Pieces (and structs) keep track of changes to their retriever data. A piece is dirty when the data of one of its
+    retrievers (or of any struct inside it) is set to a different value. Clean pieces are written using the bytes they
+    were read from. Please note that changes to lists in place, without setting the list again,
+    are not detected.
+
+    Pieces (and structs) which are read from a file also record where they were read from. `source_offset` is the
+    position of the first byte of the piece and `source_length` the amount of bytes it spans. For pieces in the header
+    this is a position in the (uncompressed) header, for all other pieces a position in the decompressed file data.
+    Both are None for pieces which weren't read from a file.
+
+    The retrievers are declared once per class (See: `create_retrievers`). An instance only stores the data of its
+    retrievers in a list (and the datatypes of which the repeat is changed). `retrievers` gives (bound) access to both.
+    """
     dependencies = {}
 
-    def __init__(self, piece_type, retrievers, parser_obj=None, data=None, pieces=None):
+    def __init__(self, piece_type, parser_obj=None, data=None, pieces=None):
         if data is not None and pieces is None:
             raise ValueError("When creating a piece based on data, a pieces dict has to be given")
-        self.piece_type = piece_type
-        self.retrievers = retrievers
-        self.parser = parser_obj
-
-        for retriever in retrievers:
-            if retriever.name in self.__class__.dependencies.keys():
-                for key, value in self.__class__.dependencies[retriever.name].items():
-                    setattr(retriever, key, value)
+        # Set directly in __dict__ as this is done for every piece and struct (See: __setattr__)
+        attributes = self.__dict__
+        attributes['piece_type'] = piece_type
+        attributes['parser'] = parser_obj
+        attributes['_dirty'] = True
+        attributes['_parent'] = None
+        attributes['_cached_bytes'] = None
+        attributes['_source'] = None
+        attributes['source_offset'] = None
+        attributes['source_length'] = None
+        # The datatypes (by position) of which the repeat differs from the datatype of the retriever
+        attributes['_datatypes'] = None
+        attributes['_values'] = [None] * len(self.get_schema().retrievers)
         if data:
             self.set_data(data, pieces)
 
+    @staticmethod
+    @abc.abstractmethod
+    def create_retrievers():
+        """Returns the retrievers of this class in the order they're stored in the file. Called once per class."""
+        return []
+
     @staticmethod
     @abc.abstractmethod
     def defaults(pieces):
         return {}
 
+    @property
+    def retrievers(self) -> RetrieverList:
+        return RetrieverList(self, self._schema.index)
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        register_piece_class(cls)
+
+    @classmethod
+    def get_schema(cls) -> PieceSchema:
+        """Returns the PieceSchema of this class. It's created once per class."""
+        schema = cls.__dict__.get('_schema')
+        if schema is None:
+            schema = cls._schema = PieceSchema(cls.create_retrievers(), cls.dependencies)
+        return schema
+
+    def __reduce__(self):
+        """
+        Pieces (and structs) are pickled as the data of their retrievers and the repeats which differ from the class
+        only. The retrievers, datatypes and dependencies are taken from the class again when unpickled.
+        """
+        return self._reduce(keep_source=False)
+
+    def _reduce(self, keep_source):
+        """
+        Args:
+            keep_source (bool): Also pickle the source (and cached bytes) of clean pieces, so they're clean after
+                unpickling. The source is shared between pieces, so it's only pickled once.
+        """
+        source_state = None
+        if keep_source and not self._dirty:
+            source_state = (self._source, self.source_offset, self.source_length, self._cached_bytes)
+        repeats = {}
+        if self._datatypes is not None:
+            repeats = {position: datatype._repeat for position, datatype in self._datatypes.items()}
+        return _restore_piece, (type(self), list(self._values), repeats, source_state)
+
     def __getattr__(self, name):
         """
         Providing a default way to access retriever data labeled 'name'
         """
-        try:
-            return get_retriever_by_name(self.retrievers, name).data
-        except:
+        position = type(self).get_schema().index.get(name)
+        if position is None or '_values' not in self.__dict__:
             raise AttributeError("No attribute retriever named \'" + name + "\' in piece \'" + str(type(self)) + "\'")
+        return self._values[position]
 
     def __setattr__(self, name, value):
         """
         Trying to edit retriever data labeled 'name' if available
         """
-        if 'retrievers' not in self.__dict__:
+        position = self._schema.index.get(name) if '_values' in self.__dict__ else None
+        if position is None:
             super().__setattr__(name, value)
         else:
-            retriever = get_retriever_by_name(self.retrievers, name)
-            if retriever is None:
-                super().__setattr__(name, value)
-            else:
-                retriever.data = value
+            self._set_value(position, value)
+
+    def _set_value(self, position, value):
+        """Set the data of the retriever at the given position. Changes mark the piece (and its parents) dirty."""
+        values = self._values
+        old_value = values[position]
+        values[position] = value
+        # Mutable values (like lists) set to themselves have (most likely) been changed in place
+        # (like: retriever.data += [...])
+        if value is old_value:
+            if type(value) not in _immutable_types:
+                self._retriever_data_changed(value)
+        elif value != old_value:
+            self._retriever_data_changed(value)
+        if self._schema.retrievers[position].log_value:
+            self.retrievers[position]._update_print(old_value, value)
+
+    def _get_datatype(self, position):
+        """Returns the datatype of the retriever at the given position, with the repeat of this instance"""
+        datatypes = self._datatypes
+        if datatypes is not None:
+            datatype = datatypes.get(position)
+            if datatype is not None:
+                return datatype
+        return self._schema.datatypes[position]
+
+    def _set_repeat(self, position, repeat):
+        """
+        Set the repeat of the retriever at the given position for this instance (See: `DataType.with_repeat`). A
+        different repeat marks the piece dirty.
+        """
+        class_datatype = self._schema.datatypes[position]
+        old_datatype = self._get_datatype(position)
+        if class_datatype.log_value:
+            print(f"[DataType] {class_datatype._debug_retriever_name} Repeat set to {repeat} from: "
+                  + old_datatype.to_simple_string())
+        if old_datatype.repeat != repeat:
+            self._mark_dirty()
+        datatype = class_datatype.with_repeat(repeat)
+        if datatype is not class_datatype:
+            if self._datatypes is None:
+                self._datatypes = {}
+            self._datatypes[position] = datatype
+        elif self._datatypes is not None:
+            self._datatypes.pop(position, None)
 
     def set_data(self, data, pieces):
-        if len(data) == len(self.retrievers):
-            for i in range(len(data)):
-                self.retrievers[i].data = data[i]
+        retrievers = self.retrievers
+        if len(data) == len(retrievers):
+            for i, retriever in enumerate(retrievers):
+                retriever.data = data[i]
 
-                if hasattr(self.retrievers[i], 'on_construct'):
-                    parser.handle_retriever_dependency(self.retrievers[i], self.retrievers, "construct", pieces)
+                if hasattr(retriever, 'on_construct'):
+                    parser.handle_retriever_dependency(retriever, retrievers, "construct", pieces)
         else:
             print(f"\nError in: {self.__class__.__name__}")
             print(f"Data: ({len(data)}) "
@@ -64,40 +204,155 @@ class AoE2Piece:
                   f"{helper.pretty_print_list([f'{i}: {str(x)}' for i, x in enumerate(self.retrievers)])}")
             raise ValueError("Data list isn't the same size as the DataType list")
 
+    def _retriever_data_changed(self, value):
+        self._adopt(value)
+        self._mark_dirty()
+
+    def _adopt(self, value):
+        """Set this piece as the parent of the struct(s) in value so changes in those structs mark this piece dirty"""
+        if type(value) is list:
+            for item in value:
+                if isinstance(item, AoE2Piece):
+                    item.__dict__['_parent'] = self
+        elif type(value) is LazyStructList:
+            value.owner = self
+        elif isinstance(value, AoE2Piece):
+            value.__dict__['_parent'] = self
+
+    def _mark_dirty(self):
+        piece = self
+        while piece is not None:
+            piece.__dict__['_dirty'] = True
+            piece = piece.__dict__['_parent']
+
+    def _set_clean(self, cached_bytes=None):
+        self.__dict__['_dirty'] = False
+        self.__dict__['_cached_bytes'] = cached_bytes
+
+    @property
+    def is_dirty(self):
+        return self._dirty
+
+    def _get_clean_bytes(self):
+        """Returns the bytes this piece was read from. None when dirty or when not available."""
+        if self._dirty:
+            return None
+        if self._cached_bytes is not None:
+            return self._cached_bytes
+        if self._source is not None:
+            return memoryview(self._source)[self.source_offset:self.source_offset + self.source_length]
+        return None
+
+    def to_bytes(self, pieces):
+        """Returns the bytes of this piece. When the piece is clean, the bytes it was read from are reused."""
+        clean_bytes = self._get_clean_bytes()
+        if clean_bytes is not None:
+            return clean_bytes
+        sink = bytearray()
+        self.write_bytes(sink, pieces)
+        return bytes(sink)
+
+    def write_bytes(self, sink, pieces):
+        """
+        Append the bytes of this piece to the sink (bytearray). When the piece is clean, the bytes it was read from are
+        reused. Writing doesn't change the piece, pieces with changes stay dirty.
+
+        Args:
+            sink (bytearray): The buffer to write to
+            pieces (OrderedDict[str, AoE2Piece]): All pieces
+        """
+        clean_bytes = self._get_clean_bytes()
+        if clean_bytes is not None:
+            sink += clean_bytes
+            return
+
+        for retriever in self.retrievers:
+            if not parser.write_retriever_bytes(retriever, pieces, sink):
+                # Write default value when no value is committed.
+                # Should only happen when a value is not transferred from and to a struct.
+                # This is because structs are recreated on file generation. When the struct does not contain
+                # a certain value because it's use is unknown, the value isn't transferred between.
+                retriever.data = self.defaults(pieces)[retriever.name]
+                parser.write_retriever_bytes(retriever, pieces, sink)
+
+    def get_source_bytes(self, source):
+        """
+        Returns the bytes this piece was read from.
+
+        Args:
+            source (Union[bytes, memoryview]): The data the piece was read from. For pieces in the header this is the
+                header, for all others the decompressed file data.
+        """
+        if self.source_offset is None:
+            raise ValueError(f"{self.__class__.__name__} was not read from a file")
+        return source[self.source_offset:self.source_offset + self.source_length]
+
     def get_value(self, retriever_key):
-        return get_retriever_by_name(self.retrievers, retriever_key).data
+        return self._values[self._schema.index[retriever_key]]
 
     def get_length(self):
+        """
+        Returns the amount of bytes of this piece. For clean pieces this is the length of the bytes they were read from,
+        so only pieces with changes are measured using their retrievers.
+        """
+        if not self._dirty:
+            if self._cached_bytes is not None:
+                return len(self._cached_bytes)
+            if self.source_length is not None:
+                return self.source_length
+
         total_length = 0
         try:
             for i in range(0, len(self.retrievers)):
-                datatype, length = parser.datatype_to_type_length(self.retrievers[i].datatype.var)
+                codec = self.retrievers[i].datatype.codec
+                datatype, length = codec.var_type, codec.var_len
 
                 if datatype == "struct":
-                    if type(self.retrievers[i].data) == list:
+                    if type(self.retrievers[i].data) == LazyStructList:
+                        length = self.retrievers[i].data.layout.size * len(self.retrievers[i].data)
+                    elif type(self.retrievers[i].data) == list:
                         for continues_struct in self.retrievers[i].data:
                             length += continues_struct.get_length()
                     else:
                         length = self.retrievers[i].data.get_length()
-                elif datatype == "str":
+                elif datatype in ["str", "bytes"]:
                     length = len(self.retrievers[i].data)
                 total_length += length
         except TypeError:
             print(self.retrievers)
         return total_length
 
-    def set_data_from_generator(self, generator, pieces=None):
+    def set_data_from_cursor(self, cursor, pieces=None):
         if self.parser:
-            for i, retriever in enumerate(self.retrievers):
+            start = cursor.tell()
+            retrievers = self.retrievers
+            values = self._values
+            for retriever in retrievers:
+                retriever_start = cursor.tell()
                 try:
-                    retriever.data, _, status = self.parser.retrieve_value(
-                        generator, retriever, self.retrievers, pieces
-                    )
+                    value, _, status = self.parser.retrieve_value(cursor, retriever, retrievers, pieces)
+                    if retriever.log_value:
+                        retriever.data = value
+                    else:
+                        # The piece is clean after reading, so the value is set without marking the piece dirty
+                        values[retriever.position] = value
+                        self._adopt(value)
                     if status is not None:
                         raise status
                 except Exception as e:
-                    print(f"\n\n[{e.__class__.__name__}] AoE2Piece.set_data_from_generator: \n\tRetriever: {retriever}")
+                    if self.parser.log_messages:
+                        print(f"\n\n[{e.__class__.__name__}] AoE2Piece.set_data_from_cursor: "
+                              f"\n\tRetriever: {retriever}"
+                              f"\n\tPosition: {retriever_start} ({self.__class__.__name__} started at: {start})")
                     raise e
+            self._set_source(start, cursor.tell() - start, cursor.buffer)
+            self._set_clean()
+
+    def _set_source(self, offset, length, source=None):
+        """Set the position this piece was read from. When source is given its bytes are reused while clean."""
+        self.__dict__['source_offset'] = offset
+        self.__dict__['source_length'] = length
+        self.__dict__['_source'] = source
 
     def _entry_to_string(self, name, data, datatype):
         return "\t" + name + ": " + data + " (" + datatype + ")\n"
@@ -191,3 +446,18 @@ class AoE2Piece:
 
     def __repr__(self):
         return type(self).__name__
+
+
+def _restore_piece(piece_class, data, repeats, source_state=None):
+    """Recreate a pickled piece (See: `AoE2Piece._reduce`). Without source_state the piece is dirty."""
+    piece = piece_class()
+    for position, repeat in repeats.items():
+        piece._set_repeat(position, repeat)
+    piece.__dict__['_values'] = data
+    for value in data:
+        piece._adopt(value)
+    if source_state is not None:
+        source, offset, length, cached_bytes = source_state
+        piece._set_source(offset, length, source)
+        piece._set_clean(cached_bytes)
+    return piece
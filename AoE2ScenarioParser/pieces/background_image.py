@@ -17,7 +17,11 @@ class BackgroundImagePiece(aoe2_piece.AoE2Piece):
     }
 
     def __init__(self, parser_obj=None, data=None, pieces=None):
-        retrievers = [
+        super().__init__("Background Image", parser_obj, data=data, pieces=pieces)
+
+    @staticmethod
+    def create_retrievers():
+        return [
             Retriever("ascii_filename", DataType("str16")),
             Retriever("picture_version", DataType("u32")),
             Retriever("bitmap_width", DataType("u32")),
@@ -26,8 +30,6 @@ class BackgroundImagePiece(aoe2_piece.AoE2Piece):
             Retriever("bitmap_info", DataType(BitMapInfoStruct), possibly_list=False),
         ]
 
-        super().__init__("Background Image", retrievers, parser_obj, data=data, pieces=pieces)
-
     @staticmethod
     def defaults(pieces):
         defaults = {
@@ -5,15 +5,17 @@ from AoE2ScenarioParser.pieces import aoe2_piece
 
 class CinematicsPiece(aoe2_piece.AoE2Piece):
     def __init__(self, parser_obj=None, data=None, pieces=None):
-        retrievers = [
+        super().__init__("Cinematics", parser_obj, data=data, pieces=pieces)
+
+    @staticmethod
+    def create_retrievers():
+        return [
             Retriever("ascii_pregame", DataType("str16")),
             Retriever("ascii_victory", DataType("str16")),
             Retriever("ascii_loss", DataType("str16")),
             # Retriever("Separator (! in some version)", DataType("1")),
         ]
 
-        super().__init__("Cinematics", retrievers, parser_obj, data=data, pieces=pieces)
-
     @staticmethod
     def defaults(pieces):
         defaults = {
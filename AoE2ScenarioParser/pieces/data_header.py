@@ -31,7 +31,11 @@ class DataHeaderPiece(aoe2_piece.AoE2Piece):
     }
 
     def __init__(self, parser_obj=None, data=None, pieces=None):
-        retrievers = [
+        super().__init__("Data Header", parser_obj, data=data, pieces=pieces)
+
+    @staticmethod
+    def create_retrievers():
+        return [
             Retriever("next_unit_id_to_place", DataType("u32")),
             Retriever("version", DataType("f32")),
             Retriever("player_names", DataType("c256", repeat=16)),
@@ -46,8 +50,6 @@ class DataHeaderPiece(aoe2_piece.AoE2Piece):
             Retriever("filename", DataType("str16")),
         ]
 
-        super().__init__("Data Header", retrievers, parser_obj, data=data, pieces=pieces)
-
     @staticmethod
     def defaults(pieces):
         defaults = {
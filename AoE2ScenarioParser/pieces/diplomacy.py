@@ -6,7 +6,11 @@ from AoE2ScenarioParser.pieces.structs.player_diplomacy import PlayerDiplomacySt
 
 class DiplomacyPiece(aoe2_piece.AoE2Piece):
     def __init__(self, parser_obj=None, data=None, pieces=None):
-        retrievers = [
+        super().__init__("Diplomacy", parser_obj, data=data, pieces=pieces)
+
+    @staticmethod
+    def create_retrievers():
+        return [
             Retriever("per_player_diplomacy", DataType(PlayerDiplomacyStruct, repeat=16)),
             Retriever("individual_victories", DataType("60", repeat=16 * 12)),  # 12 Conditions per (16) Player(s).
             Retriever("separator", DataType("u32")),
@@ -14,8 +18,6 @@ class DiplomacyPiece(aoe2_piece.AoE2Piece):
             Retriever("unknown", DataType("4")),
         ]
 
-        super().__init__("Diplomacy", retrievers, parser_obj, data=data, pieces=pieces)
-
     @staticmethod
     def defaults(pieces):
         defaults = {
@@ -27,7 +27,11 @@ class FileHeaderPiece(aoe2_piece.AoE2Piece):
     }
 
     def __init__(self, parser_obj=None, data=None, pieces=None):
-        retrievers = [
+        super().__init__("File Header", parser_obj, data=data, pieces=pieces)
+
+    @staticmethod
+    def create_retrievers():
+        return [
             Retriever("version", DataType("c4")),
             Retriever("header_length", DataType("u32")),
             Retriever("savable", DataType("s32")),
@@ -40,8 +44,6 @@ class FileHeaderPiece(aoe2_piece.AoE2Piece):
             Retriever("trigger_count", DataType("u32")),
         ]
 
-        super().__init__("File Header", retrievers, parser_obj, data=data, pieces=pieces)
-
     @staticmethod
     def defaults(pieces):
         defaults = {
@@ -52,7 +52,11 @@ class FilesPiece(aoe2_piece.AoE2Piece):
     }
 
     def __init__(self, parser_obj=None, data=None, pieces=None):
-        retrievers = [
+        super().__init__("Files", parser_obj, data=data, pieces=pieces)
+
+    @staticmethod
+    def create_retrievers():
+        return [
             Retriever("unknown_2", DataType("4")),
             Retriever("script_file_path", DataType("str16")),
             Retriever("unknown_3", DataType("4")),
@@ -63,8 +67,6 @@ class FilesPiece(aoe2_piece.AoE2Piece):
             Retriever("__END_OF_FILE_MARK__", DataType("1")),
         ]
 
-        super().__init__("Files", retrievers, parser_obj, data=data, pieces=pieces)
-
     @staticmethod
     def defaults(pieces):
         defaults = {
@@ -5,7 +5,11 @@ from AoE2ScenarioParser.pieces import aoe2_piece
 
 class GlobalVictoryPiece(aoe2_piece.AoE2Piece):
     def __init__(self, parser_obj=None, data=None, pieces=None):
-        retrievers = [
+        super().__init__("Global Victory", parser_obj, data=data, pieces=pieces)
+
+    @staticmethod
+    def create_retrievers():
+        return [
             Retriever("separator", DataType("u32")),
             Retriever("conquest_required", DataType("u32")),
             Retriever("ruins", DataType("u32")),
@@ -19,8 +23,6 @@ class GlobalVictoryPiece(aoe2_piece.AoE2Piece):
             Retriever("time_for_timed_game_in_10ths_of_a_year", DataType("u32")),
         ]
 
-        super().__init__("Global Victory", retrievers, parser_obj, data=data, pieces=pieces)
-
     @staticmethod
     def defaults(pieces):
         defaults = {
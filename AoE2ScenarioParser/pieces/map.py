@@ -60,7 +60,11 @@ class MapPiece(aoe2_piece.AoE2Piece):
     }
 
     def __init__(self, parser_obj=None, data=None, pieces=None):
-        retrievers = [
+        super().__init__("Map", parser_obj, data=data, pieces=pieces)
+
+    @staticmethod
+    def create_retrievers():
+        return [
             Retriever('separator_1', DataType("2")),
             Retriever('unknown_string', DataType("str16")),
             Retriever('separator_2', DataType("2")),
@@ -83,8 +87,6 @@ class MapPiece(aoe2_piece.AoE2Piece):
             Retriever('terrain_data', DataType(TerrainStruct))
         ]
 
-        super().__init__("Map", retrievers, parser_obj, data=data, pieces=pieces)
-
     @staticmethod
     def defaults(pieces):
         defaults = {
@@ -5,7 +5,11 @@ from AoE2ScenarioParser.pieces import aoe2_piece
 
 class MessagesPiece(aoe2_piece.AoE2Piece):
     def __init__(self, parser_obj=None, data=None, pieces=None):
-        retrievers = [
+        super().__init__("Messages", parser_obj, data=data, pieces=pieces)
+
+    @staticmethod
+    def create_retrievers():
+        return [
             Retriever("instructions", DataType("u32")),
             Retriever("hints", DataType("u32")),
             Retriever("victory", DataType("u32")),
@@ -20,8 +24,6 @@ class MessagesPiece(aoe2_piece.AoE2Piece):
             Retriever("ascii_scouts", DataType("str16")),
         ]
 
-        super().__init__("Messages", retrievers, parser_obj, data=data, pieces=pieces)
-
     @staticmethod
     def defaults(pieces):
         defaults = {
@@ -7,7 +7,11 @@ from AoE2ScenarioParser.pieces.structs.resources import ResourcesStruct
 
 class PlayerDataTwoPiece(aoe2_piece.AoE2Piece):
     def __init__(self, parser_obj=None, data=None, pieces=None):
-        retrievers = [
+        super().__init__("Player Data #2", parser_obj, data=data, pieces=pieces)
+
+    @staticmethod
+    def create_retrievers():
+        return [
             Retriever("strings", DataType("str16", repeat=32)),
             Retriever("ai_names", DataType("str16", repeat=16)),
             Retriever("ai_files", DataType(AIStruct, repeat=16)),
@@ -16,8 +20,6 @@ class PlayerDataTwoPiece(aoe2_piece.AoE2Piece):
             Retriever("resources", DataType(ResourcesStruct, repeat=16))
         ]
 
-        super().__init__("Player Data #2", retrievers, parser_obj, data=data, pieces=pieces)
-
     @staticmethod
     def defaults(pieces):
         defaults = {
@@ -5,14 +5,16 @@ from AoE2ScenarioParser.pieces.structs.aoe2_struct import AoE2Struct
 
 class AIStruct(AoE2Struct):
     def __init__(self, parser_obj=None, data=None, pieces=None):
-        retrievers = [
+        super().__init__("AI", parser_obj, data, pieces=pieces)
+
+    @staticmethod
+    def create_retrievers():
+        return [
             Retriever("unknown", DataType("u32")),
             Retriever("unknown_2", DataType("u32")),
             Retriever("ai_per_file_text", DataType("str32")),
         ]
 
-        super().__init__("AI", retrievers, parser_obj, data, pieces=pieces)
-
     @staticmethod
     def defaults(pieces):
         defaults = {
@@ -1,16 +1,43 @@
+import struct
 from abc import ABC
 
-from AoE2ScenarioParser.helper.generator import create_generator
+from AoE2ScenarioParser.helper.cursor import ByteCursor
 from AoE2ScenarioParser.pieces.aoe2_piece import AoE2Piece
 
 
 class AoE2Struct(AoE2Piece, ABC):
-    def __init__(self, piece_type, retrievers, parser_obj=None, data=None, pieces=None):
-        super().__init__(piece_type, retrievers, parser_obj, data, pieces)
+    def __init__(self, piece_type, parser_obj=None, data=None, pieces=None):
+        super().__init__(piece_type, parser_obj, data, pieces)
 
         if data and parser_obj:
-            gen = create_generator(data, 1)
-            super().set_data_from_generator(gen)
+            super().set_data_from_cursor(ByteCursor(data))
+
+    @classmethod
+    def get_fixed_layout(cls):
+        """
+        Returns a struct.Struct describing the entire struct when it has a fixed size and no dependencies. This allows
+        repeated structs to be decoded in bulk. Returns None otherwise. The result is cached per struct class.
+        """
+        if '_fixed_layout' not in cls.__dict__:
+            cls._fixed_layout = cls._create_fixed_layout()
+        return cls._fixed_layout
+
+    @classmethod
+    def _create_fixed_layout(cls):
+        if cls.dependencies:
+            return None
+        fmt = "<"
+        for retriever in cls.get_schema().retrievers:
+            codec = retriever.datatype.codec
+            if retriever.datatype.repeat != 1:
+                return None
+            if codec.struct is not None:
+                fmt += codec.struct.format[1:]
+            elif codec.var_type == "data":
+                fmt += f"{codec.var_len}s"
+            else:
+                return None
+        return struct.Struct(fmt)
 
     def _entry_to_string(self, name, data, datatype):
         return "\t\t\t" + name + ": " + data + " (" + datatype + ")\n"
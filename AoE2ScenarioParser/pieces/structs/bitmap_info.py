@@ -21,7 +21,11 @@ class BitMapInfoStruct(AoE2Struct):
     }
 
     def __init__(self, parser_obj=None, data=None, pieces=None):
-        retrievers = [
+        super().__init__("BitMap Info", parser_obj, data=data, pieces=pieces)
+
+    @staticmethod
+    def create_retrievers():
+        return [
             Retriever("size", DataType("s32")),
             Retriever("width", DataType("u32")),
             Retriever("height", DataType("u32")),
@@ -34,11 +38,9 @@ class BitMapInfoStruct(AoE2Struct):
             Retriever("number_of_colors_used", DataType("u32")),
             Retriever("important_colors", DataType("u32")),
             Retriever("colors_used", DataType("u32")),
-            Retriever("image", DataType("u8")),
+            Retriever("image", DataType("bytes"), possibly_list=False),
         ]
 
-        super().__init__("BitMap Info", retrievers, parser_obj, data=data, pieces=pieces)
-
     @staticmethod
     def defaults(pieces):
         defaults = {}
@@ -35,7 +35,11 @@ class ConditionStruct(AoE2Struct):
     }
 
     def __init__(self, parser_obj=None, data=None, pieces=None):
-        retrievers = [
+        super().__init__("Condition", parser_obj, data, pieces=pieces)
+
+    @staticmethod
+    def create_retrievers():
+        return [
             Retriever("condition_type", DataType("s32")),
             Retriever("static_value_21", DataType("s32")),  # Was always: 0x10
             Retriever("amount_or_quantity", DataType("s32")),  # Also technology state, also Difficulty
@@ -67,8 +71,6 @@ class ConditionStruct(AoE2Struct):
             Retriever("xs_function", DataType("str32")),
         ]
 
-        super().__init__("Condition", retrievers, parser_obj, data, pieces=pieces)
-
     @staticmethod
     def defaults(pieces):
         defaults = {
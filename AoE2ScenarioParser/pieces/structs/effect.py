@@ -68,7 +68,11 @@ class EffectStruct(AoE2Struct):
     }
 
     def __init__(self, parser_obj=None, data=None, pieces=None):
-        retrievers = [
+        super().__init__("Effect", parser_obj, data, pieces=pieces)
+
+    @staticmethod
+    def create_retrievers():
+        return [
             Retriever("effect_type", DataType("s32")),
             Retriever("static_value_46", DataType("s32")),  # always 0x17, now 0x30 (48)?
             Retriever("ai_script_goal", DataType("s32")),
@@ -126,8 +130,6 @@ class EffectStruct(AoE2Struct):
             Retriever("selected_object_ids", DataType("s32")),
         ]
 
-        super().__init__("Effect", retrievers, parser_obj, data, pieces=pieces)
-
     @staticmethod
     def defaults(pieces):
         defaults = {
@@ -5,7 +5,11 @@ from AoE2ScenarioParser.pieces.structs.aoe2_struct import AoE2Struct
 
 class PlayerDataFourStruct(AoE2Struct):
     def __init__(self, parser_obj=None, data=None, pieces=None):
-        retrievers = [
+        super().__init__("Player Data #4", parser_obj, data, pieces=pieces)
+
+    @staticmethod
+    def create_retrievers():
+        return [
             Retriever("food_duplicate", DataType("f32")),
             Retriever("wood_duplicate", DataType("f32")),
             Retriever("gold_duplicate", DataType("f32")),
@@ -15,8 +19,6 @@ class PlayerDataFourStruct(AoE2Struct):
             Retriever("population_limit", DataType("f32")),
         ]
 
-        super().__init__("Player Data #4", retrievers, parser_obj, data, pieces=pieces)
-
     @staticmethod
     def defaults(pieces):
         defaults = {
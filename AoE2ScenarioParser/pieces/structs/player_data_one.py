@@ -5,7 +5,11 @@ from AoE2ScenarioParser.pieces.structs.aoe2_struct import AoE2Struct
 
 class PlayerDataOneStruct(AoE2Struct):
     def __init__(self, parser_obj=None, data=None, pieces=None):
-        retrievers = [
+        super().__init__("Player Data #1", parser_obj, data, pieces=pieces)
+
+    @staticmethod
+    def create_retrievers():
+        return [
             Retriever("active", DataType("u32")),
             Retriever("human", DataType("u32")),
             Retriever("civilization", DataType("u32")),
@@ -13,8 +17,6 @@ class PlayerDataOneStruct(AoE2Struct):
             Retriever("cty_mode", DataType("u32")),
         ]
 
-        super().__init__("Player Data #1", retrievers, parser_obj, data, pieces=pieces)
-
     @staticmethod
     def defaults(pieces):
         # This default is adjusted in DataHeaderPiece:
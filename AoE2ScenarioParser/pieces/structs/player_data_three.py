@@ -61,7 +61,11 @@ class PlayerDataThreeStruct(AoE2Struct):
     }
 
     def __init__(self, parser_obj=None, data=None, pieces=None):
-        retrievers = [
+        super().__init__("Player Data #3", parser_obj, data, pieces=pieces)
+
+    @staticmethod
+    def create_retrievers():
+        return [
             Retriever("constant_name", DataType("str16")),
             Retriever("initial_camera_x", DataType("f32")),
             Retriever("initial_camera_y", DataType("f32")),
@@ -83,8 +87,6 @@ class PlayerDataThreeStruct(AoE2Struct):
             Retriever("unknown_4", DataType("s32")),
         ]
 
-        super().__init__("Player Data #3", retrievers, parser_obj, data, pieces=pieces)
-
     @staticmethod
     def defaults(pieces):
         defaults = {
@@ -25,13 +25,15 @@ class PlayerUnitsStruct(AoE2Struct):
     }
 
     def __init__(self, parser_obj=None, data=None, pieces=None):
-        retrievers = [
+        super().__init__("Player Units", parser_obj, data, pieces=pieces)
+
+    @staticmethod
+    def create_retrievers():
+        return [
             Retriever("unit_count", DataType("u32")),
             Retriever("units", DataType(UnitStruct))
         ]
 
-        super().__init__("Player Units", retrievers, parser_obj, data, pieces=pieces)
-
     @staticmethod
     def defaults(pieces):
         defaults = {
@@ -5,7 +5,11 @@ from AoE2ScenarioParser.pieces.structs.aoe2_struct import AoE2Struct
 
 class ResourcesStruct(AoE2Struct):
     def __init__(self, parser_obj=None, data=None, pieces=None):
-        retrievers = [
+        super().__init__("Resources", parser_obj, data, pieces=pieces)
+
+    @staticmethod
+    def create_retrievers():
+        return [
             Retriever("gold", DataType("u32")),
             Retriever("wood", DataType("u32")),
             Retriever("food", DataType("u32")),
@@ -15,8 +19,6 @@ class ResourcesStruct(AoE2Struct):
             Retriever("player_color", DataType("u32"))
         ]
 
-        super().__init__("Resources", retrievers, parser_obj, data, pieces=pieces)
-
     @staticmethod
     def defaults(pieces):
         defaults = {
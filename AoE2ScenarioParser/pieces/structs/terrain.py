@@ -5,7 +5,11 @@ from AoE2ScenarioParser.pieces.structs.aoe2_struct import AoE2Struct
 
 class TerrainStruct(AoE2Struct):
     def __init__(self, parser_obj=None, data=None, pieces=None):
-        retrievers = [
+        super().__init__("Terrain", parser_obj, data, pieces=pieces)
+
+    @staticmethod
+    def create_retrievers():
+        return [
             Retriever("terrain_id", DataType("u8")),
             Retriever("elevation", DataType("u8")),
             Retriever("unused", DataType("u8")),
@@ -13,8 +17,6 @@ class TerrainStruct(AoE2Struct):
             Retriever("layer", DataType("s16"))
         ]
 
-        super().__init__("Terrain", retrievers, parser_obj, data, pieces=pieces)
-
     @staticmethod
     def defaults(pieces):
         defaults = {
@@ -56,7 +56,11 @@ class TriggerStruct(AoE2Struct):
     }
 
     def __init__(self, parser_obj=None, data=None, pieces=None):
-        retrievers = [
+        super().__init__("Trigger", parser_obj, data, pieces=pieces)
+
+    @staticmethod
+    def create_retrievers():
+        return [
             Retriever("enabled", DataType("u32")),
             Retriever("looping", DataType("s8")),
             Retriever("description_string_table_id", DataType("s32")),
@@ -79,8 +83,6 @@ class TriggerStruct(AoE2Struct):
             Retriever("condition_display_order_array", DataType("s32"))
         ]
 
-        super().__init__("Trigger", retrievers, parser_obj, data, pieces=pieces)
-
     @staticmethod
     def defaults(pieces):
         defaults = {
@@ -5,7 +5,11 @@ from AoE2ScenarioParser.pieces.structs.aoe2_struct import AoE2Struct
 
 class UnitStruct(AoE2Struct):
     def __init__(self, parser_obj=None, data=None, pieces=None):
-        retrievers = [
+        super().__init__("Unit", parser_obj, data, pieces=pieces)
+
+    @staticmethod
+    def create_retrievers():
+        return [
             Retriever("x", DataType("f32")),
             Retriever("y", DataType("f32")),
             Retriever("z", DataType("f32")),
@@ -18,8 +22,6 @@ class UnitStruct(AoE2Struct):
             Retriever("garrisoned_in_id", DataType("s32")),
         ]
 
-        super().__init__("Unit", retrievers, parser_obj, data, pieces=pieces)
-
     @staticmethod
     def defaults(pieces):
         defaults = {
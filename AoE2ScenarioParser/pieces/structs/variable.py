@@ -5,13 +5,15 @@ from AoE2ScenarioParser.pieces.structs.aoe2_struct import AoE2Struct
 
 class VariableStruct(AoE2Struct):
     def __init__(self, parser_obj=None, data=None, pieces=None):
-        retrievers = [
+        super().__init__("Variable", parser_obj, data, pieces=pieces)
+
+    @staticmethod
+    def create_retrievers():
+        return [
             Retriever("variable_id", DataType("u32")),
             Retriever("name", DataType("str32")),
         ]
 
-        super().__init__("Variable", retrievers, parser_obj, data, pieces=pieces)
-
     @staticmethod
     def defaults(pieces):
         defaults = {
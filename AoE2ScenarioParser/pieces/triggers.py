@@ -60,7 +60,11 @@ class TriggerPiece(aoe2_piece.AoE2Piece):
     }
 
     def __init__(self, parser_obj=None, data=None, pieces=None):
-        retrievers = [
+        super().__init__("Triggers", parser_obj, data=data, pieces=pieces)
+
+    @staticmethod
+    def create_retrievers():
+        return [
             Retriever("trigger_version", DataType("f64")),
             Retriever("trigger_instruction_start", DataType("s8")),
             Retriever("number_of_triggers", DataType("s32")),
@@ -71,8 +75,6 @@ class TriggerPiece(aoe2_piece.AoE2Piece):
             Retriever("variable_data", DataType(VariableStruct)),
         ]
 
-        super().__init__("Triggers", retrievers, parser_obj, data=data, pieces=pieces)
-
     @staticmethod
     def defaults(pieces):
         defaults = {
@@ -32,7 +32,11 @@ class UnitsPiece(aoe2_piece.AoE2Piece):
     }
 
     def __init__(self, parser_obj=None, data=None, pieces=None):
-        retrievers = [
+        super().__init__("Units", parser_obj, data=data, pieces=pieces)
+
+    @staticmethod
+    def create_retrievers():
+        return [
             Retriever("number_of_unit_sections", DataType("u32")),
             Retriever("player_data_4", DataType(PlayerDataFourStruct, repeat=8)),
             Retriever("number_of_players", DataType("u32")),  # Also always 9 (Gaia + 8Plyrs)
@@ -40,8 +44,6 @@ class UnitsPiece(aoe2_piece.AoE2Piece):
             Retriever("players_units", DataType(PlayerUnitsStruct)),
         ]
 
-        super().__init__("Units", retrievers, parser_obj, data=data, pieces=pieces)
-
     @staticmethod
     def defaults(pieces):
         defaults = {
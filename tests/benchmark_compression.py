@@ -0,0 +1,71 @@
+"""
+Reports the file size and time of the compression presets (and some other zlib settings) used when writing scenarios.
+
+Only the (already decompressed) data is compressed again, the scenario itself isn't parsed. This way the benchmark also
+works for scenarios with versions which can't be read (like the bundled maps).
+
+Usage (from the root of the repository):
+    python -m tests.benchmark_compression [scenario_path] [repeat]
+"""
+import sys
+import time
+import zlib
+
+from AoE2ScenarioParser.aoe2_scenario import compression_presets, create_compressor
+
+default_scenario = "resources/maps/AllEffects.aoe2scenario"
+
+
+def find_compressed_data(file_data: bytes, max_header_length: int = 2 ** 16) -> int:
+    """
+    Returns the position of the compressed data. The length of the header depends on the version of the scenario so it
+    is found by trying to decompress the data from every position.
+    """
+    for position in range(8, min(max_header_length, len(file_data))):
+        decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+        try:
+            decompressor.decompress(file_data[position:])
+        except zlib.error:
+            continue
+        if decompressor.eof and not decompressor.unused_data:
+            return position
+    raise ValueError("Unable to find the compressed data in the file")
+
+
+def benchmark(data: bytes, compression_settings, repeat: int):
+    """Returns the compressed size and the best time (in seconds) out of `repeat` runs"""
+    best_time = None
+    size = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        compressor = create_compressor(compression_settings)
+        size = len(compressor.compress(data) + compressor.flush())
+        duration = time.perf_counter() - start
+        best_time = duration if best_time is None else min(best_time, duration)
+    return size, best_time
+
+
+def main(path: str = default_scenario, repeat: int = 5):
+    with open(path, "rb") as file:
+        file_data = file.read()
+    position = find_compressed_data(file_data)
+    data = zlib.decompress(file_data[position:], -zlib.MAX_WBITS)
+
+    settings = [(f"preset: {name}", value) for name, value in compression_presets.items()]
+    settings += [(f"level: {level}", (level, zlib.DEF_MEM_LEVEL, zlib.Z_DEFAULT_STRATEGY)) for level in range(0, 10)]
+    settings += [
+        ("strategy: filtered", (9, zlib.DEF_MEM_LEVEL, zlib.Z_FILTERED)),
+        ("strategy: huffman only", (9, zlib.DEF_MEM_LEVEL, zlib.Z_HUFFMAN_ONLY)),
+        ("strategy: rle", (9, zlib.DEF_MEM_LEVEL, zlib.Z_RLE)),
+    ]
+
+    print(f"File: {path} (header: {position} bytes, compressed: {len(file_data) - position} bytes, "
+          f"decompressed: {len(data)} bytes)")
+    print(f"{'Settings':<24}{'Size (bytes)':>14}{'Ratio':>9}{'Time (ms)':>12}")
+    for name, compression_settings in settings:
+        size, best_time = benchmark(data, compression_settings, repeat)
+        print(f"{name:<24}{size:>14}{size / len(data):>9.3f}{best_time * 1000:>12.2f}")
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:2], *[int(arg) for arg in sys.argv[2:3]])
@@ -1,4 +1,15 @@
+import asyncio
+import io
+import os
+import pickle
+import shutil
+import time
+
 from AoE2ScenarioParser.aoe2_scenario import AoE2Scenario
+from AoE2ScenarioParser.helper import helper
+from AoE2ScenarioParser.helper.retriever import get_retriever_by_name
+from AoE2ScenarioParser.helper.scenario_cache import ScenarioCache
+from AoE2ScenarioParser.objects import terrain_grid
 
 
 def write_to_file(scx_type: str, scx: AoE2Scenario):
@@ -8,3 +19,254 @@ def write_to_file(scx_type: str, scx: AoE2Scenario):
 def read_ai_file(scx_name: str):
     scx = AoE2Scenario.from_file(scx_name)
     scx.write_to_file(f"./results/read/test_ai_file.aoe2scenario")
+
+
+def replace_terrain_tile(scx_name: str):
+    """A clean tile which replaces another tile has to be written, not the bytes of the tile it replaced"""
+    scx = AoE2Scenario.from_file(scx_name)
+    terrain_data = scx._parsed_data['MapPiece'].terrain_data
+    tile = terrain_data[len(terrain_data) - 1]
+    tile.terrain_id, tile.elevation = 3, 5
+    scx.write_to_file(f"./results/read/test_replace_terrain_tile.aoe2scenario")
+
+    # The last tile of the written scenario is clean, as it's read from the file
+    scx = AoE2Scenario.from_file(f"./results/read/test_replace_terrain_tile.aoe2scenario")
+    terrain_data = scx._parsed_data['MapPiece'].terrain_data
+    tile = terrain_data[len(terrain_data) - 1]
+    assert not tile.is_dirty and (tile.terrain_id, tile.elevation) == (3, 5)
+    assert (terrain_data[0].terrain_id, terrain_data[0].elevation) != (3, 5)
+    terrain_data[0] = tile
+    scx.write_to_file(f"./results/read/test_replace_terrain_tile.aoe2scenario")
+
+    first_tile = AoE2Scenario.from_file(f"./results/read/test_replace_terrain_tile.aoe2scenario") \
+        ._parsed_data['MapPiece'].terrain_data[0]
+    assert (first_tile.terrain_id, first_tile.elevation) == (3, 5)
+
+
+def pickle_keeps_dirty_state(scx_name: str):
+    """Pickling a scenario serializes pieces with changes without marking them clean"""
+    scx = AoE2Scenario.from_file(scx_name)
+    map_piece = scx._parsed_data['MapPiece']
+    map_piece.terrain_data[0].elevation = 5
+    assert map_piece.is_dirty
+    unpickled = pickle.loads(pickle.dumps(scx))
+    assert map_piece.is_dirty
+    assert unpickled._parsed_data['MapPiece'].terrain_data[0].elevation == 5
+
+
+def pickle_manager_changes(scx_name: str):
+    """Changes to the managers are pickled as bytes, without the manager objects or changing the scenario"""
+    scx = AoE2Scenario.from_file(scx_name)
+    scx.map_manager.terrain[0].elevation = 5
+    data = pickle.dumps(scx)
+    assert b'TerrainObject' not in data
+    assert not scx._parsed_data['MapPiece'].is_dirty
+    assert pickle.loads(data).map_manager.terrain[0].elevation == 5
+
+
+def _get_tiles(terrain):
+    return [(tile.terrain_id, tile.elevation, tile.layer) for tile in terrain]
+
+
+def _edit_terrain_grid(scx_name: str, use_numpy: bool):
+    """Edit the terrain grid with or without numpy (when installed) and return the tiles"""
+    numpy = terrain_grid.numpy
+    terrain_grid.numpy = numpy if use_numpy else None
+    try:
+        map_manager = AoE2Scenario.from_file(scx_name).map_manager
+        grid = map_manager.terrain_grid
+        grid.fill(0, 0, 3, 2, terrain_id=7, layer=5)
+        grid.replace_terrain(0, 11)
+        grid.stamp_elevation(10, 10, 12, 14, 4)
+        map_manager.map_size += 2
+        return _get_tiles(grid.to_terrain_objects())
+    finally:
+        terrain_grid.numpy = numpy
+
+
+def terrain_grid_edits(scx_name: str):
+    """The terrain grid gives the same tiles with numpy and array.array, and the same tiles as the terrain list"""
+    tiles = _edit_terrain_grid(scx_name, use_numpy=True)
+    assert tiles == _edit_terrain_grid(scx_name, use_numpy=False)
+
+    map_manager = AoE2Scenario.from_file(scx_name).map_manager
+    map_size = map_manager.map_size
+    terrain = map_manager.terrain
+    for x in range(0, 4):
+        for y in range(0, 3):
+            tile = terrain[helper.xy_to_i(x, y, map_size)]
+            tile.terrain_id, tile.layer = 7, 5
+    for tile in terrain:
+        if tile.terrain_id == 0:
+            tile.terrain_id = 11
+    map_manager.create_hill(10, 10, 12, 14, 4)
+    map_manager.map_size += 2
+    assert tiles == _get_tiles(map_manager.terrain)
+    assert len(tiles) == (map_size + 2) ** 2
+
+
+def terrain_grid_commit(scx_name: str):
+    """Changes to the terrain grid are written, an unchanged grid doesn't change the MapPiece"""
+    scx = AoE2Scenario.from_file(scx_name)
+    scx.map_manager.terrain_grid
+    scx._object_manager.reconstruct()
+    assert not scx._parsed_data['MapPiece'].is_dirty
+
+    grid = scx.map_manager.terrain_grid
+    grid.fill(2, 3, 5, 5, terrain_id=9, elevation=3)
+    grid.stamp_elevation(20, 20, 21, 21, 5)
+    scx.write_to_file(f"./results/read/test_terrain_grid_commit.aoe2scenario")
+
+    written = AoE2Scenario.from_file(f"./results/read/test_terrain_grid_commit.aoe2scenario")
+    assert _get_tiles(written.map_manager.terrain) == _get_tiles(grid.to_terrain_objects())
+
+
+def _count_triggers(scx: AoE2Scenario):
+    return len(scx.trigger_manager.triggers)
+
+
+def map_files_results(scx_name: str):
+    """A failing path doesn't stop the other paths, paths which would write the same output file are rejected"""
+    broken = "./results/read/test_map_files_broken.aoe2scenario"
+    with open(broken, "wb") as file:
+        file.write(b"not a scenario")
+    output_directory = "./results/map_files"
+    shutil.rmtree(output_directory, ignore_errors=True)
+    os.makedirs(output_directory)
+
+    results = AoE2Scenario.map_files([broken, scx_name], _count_triggers, workers=2, output_directory=output_directory)
+    assert [result.path for result in results] == [broken, scx_name]
+    assert not results[0].ok and results[0].value is None
+    assert results[1].ok and results[1].value == _count_triggers(AoE2Scenario.from_file(scx_name))
+    assert os.listdir(output_directory) == [os.path.basename(scx_name)]
+
+    duplicate = f"./results/read/map_files/{os.path.basename(scx_name)}"
+    os.makedirs(os.path.dirname(duplicate), exist_ok=True)
+    shutil.copyfile(scx_name, duplicate)
+    shutil.rmtree(output_directory)
+    os.makedirs(output_directory)
+    results = AoE2Scenario.map_files([scx_name, broken, duplicate], _count_triggers, workers=1,
+                                     output_directory=output_directory, log_reading=False)
+    assert [result.ok for result in results] == [False, False, False]
+    assert "would be written by 2 paths" in results[0].error and "would be written by 2 paths" in results[2].error
+    assert "would be written" not in results[1].error
+    assert os.listdir(output_directory) == []
+
+
+def scenario_cache(scx_name: str):
+    """Snapshots are used after they're stored, not for changed files and are evicted by size and age"""
+    cache = ScenarioCache("./results/cache")
+    cache.clear()
+    with open(scx_name, "rb") as file:
+        key = cache.get_key(file.read())
+
+    assert cache.load(key) is None
+    scx = AoE2Scenario.from_file(scx_name, cache_dir=cache)
+    assert cache.load(key) is not None
+    cached = AoE2Scenario.from_file(scx_name, cache_dir=cache)
+    assert cached.to_bytes() == scx.to_bytes()
+
+    scx.trigger_manager.triggers[0].name = "cache"
+    changed_name = "./results/read/test_scenario_cache_changed.aoe2scenario"
+    scx.write_to_file(changed_name)
+    with open(changed_name, "rb") as file:
+        changed_key = cache.get_key(file.read())
+    assert changed_key != key and cache.load(changed_key) is None
+    assert AoE2Scenario.from_file(changed_name, cache_dir=cache).trigger_manager.triggers[0].name == "cache"
+
+    # Both snapshots exist, the least recently used (the first) is evicted to fit the size of one snapshot
+    snapshot_size = os.path.getsize(cache._get_path(changed_key))
+    old = time.time() - 60
+    os.utime(cache._get_path(key), (old, old))
+    ScenarioCache(cache.directory, max_size=snapshot_size).evict()
+    assert cache.load(key) is None and cache.load(changed_key) is not None
+
+    os.utime(cache._get_path(changed_key), (old, old))
+    ScenarioCache(cache.directory, max_age=30).evict()
+    assert cache.load(changed_key) is None
+
+
+def bytes_round_trip(scx_name: str):
+    """Reading from and writing to memory gives the same bytes as writing to a file"""
+    with open(scx_name, "rb") as file:
+        file_data = file.read()
+    scx = AoE2Scenario.from_bytes(file_data)
+    scx.trigger_manager.triggers[0].name = "bytes"
+    scx.write_to_file("./results/read/test_bytes_round_trip.aoe2scenario")
+    with open("./results/read/test_bytes_round_trip.aoe2scenario", "rb") as file:
+        written = file.read()
+    assert scx.to_bytes() == written
+
+    stream = io.BytesIO()
+    AoE2Scenario.from_stream(io.BytesIO(written)).write(stream)
+    assert stream.getvalue() == written
+    assert AoE2Scenario.from_bytes(written).trigger_manager.triggers[0].name == "bytes"
+
+
+async def _cancel_when_writing(task, directory):
+    """Cancel the task once its temporary file exists (or let it finish when it's done before that)"""
+    while not task.done():
+        if any(name.endswith(".tmp") for name in os.listdir(directory)):
+            task.cancel()
+            break
+        await asyncio.sleep(0)
+    try:
+        await task
+        return False
+    except asyncio.CancelledError:
+        return True
+
+
+async def _async_cancellation(scx_name: str):
+    task = asyncio.ensure_future(AoE2Scenario.aload(scx_name))
+    await asyncio.sleep(0)
+    task.cancel()
+    try:
+        await task
+        assert False, "aload wasn't cancelled"
+    except asyncio.CancelledError:
+        pass
+
+    directory = "./results/async"
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory)
+    filename = f"{directory}/test_async_cancellation.aoe2scenario"
+    scx = await AoE2Scenario.aload(scx_name)
+    await scx.asave(filename)
+    with open(filename, "rb") as file:
+        before = file.read()
+
+    scx.trigger_manager.triggers[0].name = "cancelled"
+    cancelled = await _cancel_when_writing(asyncio.ensure_future(scx.asave(filename, compression="max")), directory)
+    # The cancelled write stops in the executor thread after the task is cancelled
+    while any(name.endswith(".tmp") for name in os.listdir(directory)):
+        await asyncio.sleep(0.01)
+    with open(filename, "rb") as file:
+        after = file.read()
+    # The file is either unchanged (cancelled) or completely written (finished before it was cancelled)
+    assert os.listdir(directory) == [os.path.basename(filename)]
+    assert after == before if cancelled else after == scx.to_bytes(compression="max")
+
+
+def async_cancellation(scx_name: str):
+    """Cancelling aload raises CancelledError, cancelling asave leaves no partial (or temporary) file behind"""
+    asyncio.run(_async_cancellation(scx_name))
+
+
+def in_place_changes_are_written(scx_name: str):
+    """A list changed in place and set again is written, a different repeat marks the piece dirty"""
+    scx = AoE2Scenario.from_file(scx_name)
+    options = scx._parsed_data['OptionsPiece']
+    starting_ages = options.per_player_starting_age
+    starting_ages[0] += 1
+    options.per_player_starting_age = starting_ages
+    scx.write_to_file("./results/read/test_in_place_changes_are_written.aoe2scenario")
+    written = AoE2Scenario.from_file("./results/read/test_in_place_changes_are_written.aoe2scenario")
+    assert written._parsed_data['OptionsPiece'].per_player_starting_age == starting_ages
+
+    player_names = get_retriever_by_name(written._parsed_data['DataHeaderPiece'].retrievers, "player_names")
+    assert not written._parsed_data['DataHeaderPiece'].is_dirty
+    player_names.set_repeat(player_names.datatype.repeat)
+    assert not written._parsed_data['DataHeaderPiece'].is_dirty
+    player_names.set_repeat(player_names.datatype.repeat - 1)
+    assert written._parsed_data['DataHeaderPiece'].is_dirty
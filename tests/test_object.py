@@ -51,7 +51,17 @@ if __name__ == "__main__":
         general.write_to_file
     ]
     other_scenarios_tests: List[Tuple[Callable, List[str]]] = [
-        (general.read_ai_file, ["ai_scx.aoe2scenario"])
+        (general.read_ai_file, ["ai_scx.aoe2scenario"]),
+        (general.replace_terrain_tile, ["default_scx.aoe2scenario"]),
+        (general.pickle_keeps_dirty_state, ["default_scx.aoe2scenario"]),
+        (general.pickle_manager_changes, ["default_scx.aoe2scenario"]),
+        (general.terrain_grid_edits, ["default_scx.aoe2scenario"]),
+        (general.terrain_grid_commit, ["default_scx.aoe2scenario"]),
+        (general.map_files_results, ["default_scx.aoe2scenario"]),
+        (general.scenario_cache, ["default_scx.aoe2scenario"]),
+        (general.bytes_round_trip, ["default_scx.aoe2scenario"]),
+        (general.async_cancellation, ["default_scx.aoe2scenario"]),
+        (general.in_place_changes_are_written, ["default_scx.aoe2scenario"]),
     ]
 
     TestObject.init("./source/")